@@ -0,0 +1,103 @@
+"""
+Measure the throughput of ``/admin/api/token`` at several concurrency levels,
+with passwords hashed inline on the request threads and on the hashing pool,
+along with the latency of a cheap request made during the burst of logins.
+
+Run it from the project root::
+
+    python benchmarks/bench_login.py [LOGINS]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from djask import Djask
+from djask.admin import Admin
+from djask.auth.models import User
+
+LOGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+CONCURRENCY = (1, 4, 16)
+
+
+def make_app(path: str, workers: int) -> Djask:
+    app = Djask(
+        __name__,
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "DJASK_PASSWORD_HASH_WORKERS": workers,
+        },
+    )
+    Admin(app, mode="api")
+    with app.app_context():
+        app.db.create_all()
+        if User.query.filter_by(username="admin").first() is None:
+            user = User(username="admin", is_admin=True)
+            user.set_password("password")
+            app.db.session.add(user)
+            app.db.session.commit()
+    return app
+
+
+def run(app: Djask, concurrency: int) -> tuple:
+    with app.test_client() as client:
+        token = client.post(
+            "/admin/api/token", data={"username": "admin", "password": "password"}
+        ).json["access_token"]
+    done = threading.Event()
+    latencies = []
+
+    def login(count: int) -> None:
+        client = app.test_client()
+        for _ in range(count):
+            resp = client.post(
+                "/admin/api/token",
+                data={"username": "admin", "password": "password"},
+            )
+            assert resp.status_code == 200
+
+    def probe() -> None:
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get("/admin/api/user/1", headers={"Authorization": token})
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.005)
+
+    threads = [
+        threading.Thread(target=login, args=(LOGINS // concurrency,))
+        for _ in range(concurrency)
+    ]
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+    logins = LOGINS // concurrency * concurrency
+    return logins / elapsed, statistics.median(latencies) * 1000
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    print(f"{LOGINS} logins, {cpus} CPUs")
+    print(f"{'hashing':<10} {'threads':>8} {'logins/s':>10} {'probe p50 ms':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        for label, workers in (("inline", 0), ("pool", max(1, cpus // 2))):
+            app = make_app(path, workers)
+            for concurrency in CONCURRENCY:
+                throughput, latency = run(app, concurrency)
+                print(
+                    f"{label:<10} {concurrency:>8} {throughput:>10.1f} {latency:>14.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
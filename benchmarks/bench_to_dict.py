@@ -0,0 +1,80 @@
+"""
+Compare the compiled ``BaseModel.to_dict`` with the reflective implementation
+it replaced, on a wide model.
+
+Run it from the project root::
+
+    python benchmarks/bench_to_dict.py
+"""
+import timeit
+
+import sqlalchemy as sa
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm.collections import InstrumentedList
+
+from djask import Djask
+from djask.auth.abstract import AbstractUser
+from djask.db.models import Model
+
+COLUMNS = 60
+ROWS = 2000
+
+Wide = type(
+    "Wide",
+    (Model,),
+    {f"column_{i}": sa.Column(sa.String(32)) for i in range(COLUMNS)},
+)
+
+
+def reflective_to_dict(self, exclude=None):
+    """``BaseModel.to_dict`` as of 0.6"""
+    result = {}
+    for k, v in self.__dict__.items():
+        conditions = (
+            k.startswith("_"),
+            isinstance(self, AbstractUser) and k == "password_hash",
+            exclude is not None and k in exclude,
+        )
+        if any(conditions):
+            continue
+        result[k] = v
+    for k, v in inspect(type(self)).relationships.items():
+        if exclude is None or k not in exclude:
+            attribute = self.__getattribute__(k)
+            if isinstance(attribute, InstrumentedList):
+                result[k] = [
+                    item.to_dict(exclude=v.back_populates)
+                    for item in attribute
+                    if hasattr(item, "to_dict")
+                ]
+            elif hasattr(attribute, "to_dict"):
+                result[k] = attribute.to_dict(exclude=(v.back_populates))
+    return result
+
+
+def main():
+    app = Djask(__name__, {"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        app.db.create_all()
+        app.db.session.add_all(
+            Wide(**{f"column_{i}": f"value {i}" for i in range(COLUMNS)})
+            for _ in range(ROWS)
+        )
+        app.db.session.commit()
+        rows = Wide.query.all()
+        assert all(reflective_to_dict(row) == row.to_dict() for row in rows)
+
+        def run(serialize):
+            return min(
+                timeit.repeat(lambda: [serialize(row) for row in rows], number=5)
+            )
+
+        reflective = run(reflective_to_dict)
+        compiled = run(Wide.to_dict)
+        print(f"{ROWS} rows x {COLUMNS + 3} columns, best of 5 runs of 5 passes")
+        print(f"reflective to_dict: {reflective:.4f}s")
+        print(f"compiled to_dict:   {compiled:.4f}s ({reflective / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
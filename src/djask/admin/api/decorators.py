@@ -3,19 +3,30 @@ from functools import wraps
 
 from flask import abort
 
+from djask.auth.claims import authorize_admin
 from djask.globals import current_app
+from djask.globals import request
 from djask.helpers import get_user_from_headers
 
 
 def admin_required_api(f: t.Callable) -> t.Callable:
     """Require admin access in web api
 
+    With ``DJASK_TOKEN_CLAIMS``, the tokens carrying claims are authorized
+    without loading the user.
+
     :param f: The view function/method to be decorated
     :return: The view function
     """
 
     @wraps(f)
     def decorator(*args, **kwargs) -> t.Callable:
+        if current_app.config["DJASK_TOKEN_CLAIMS"]:
+            authorized = authorize_admin(request.headers.get("Authorization"))
+            if authorized is not None:
+                if not authorized:
+                    abort(403)
+                return current_app.ensure_sync(f)(*args, **kwargs)
         user = get_user_from_headers()
         if user is None or not user.is_admin:
             abort(403)  # pragma: no cover
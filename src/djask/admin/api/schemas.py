@@ -12,6 +12,11 @@ class TokenInSchema(Schema):
 class TokenOutSchema(Schema):
     access_token = String()
     expires_in = Integer()
+    refresh_token = String()
+
+
+class RefreshTokenInSchema(Schema):
+    refresh_token = String(required=True)
 
 
 class UserOutSchema(Schema):
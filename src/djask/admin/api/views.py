@@ -1,18 +1,207 @@
+from __future__ import annotations
+
+from typing import Any
+
+import sqlalchemy as sa
 from apiflask.exceptions import abort
 from flask import jsonify
+from flask import Response
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import ETags
+from werkzeug.http import is_resource_modified
 
+from ..export import export_model
 from .decorators import admin_required_api
+from .schemas import RefreshTokenInSchema
 from .schemas import TokenInSchema
 from .schemas import TokenOutSchema
+from .schemas import UserInSchema
+from djask.auth.abstract import AbstractUser
+from djask.auth.claims import bump_generations
+from djask.auth.claims import REVOKING_COLUMNS
+from djask.auth.models import RefreshToken
 from djask.blueprints import APIBlueprint
+from djask.compression import strip_coding
+from djask.caching import record_changes
+from djask.db.filters import build_filters
 from djask.extensions import db
 from djask.globals import current_app
 from djask.globals import g
 from djask.globals import request
+from djask.helpers import make_etag
+from djask.helpers import parse_expand
 
 admin_bp = APIBlueprint("admin_api", __name__)
 
 
+def _expand(model, default=None):
+    """Read the ``expand`` query argument.
+
+    Return the resolved expand tree for ``to_dict`` and a query eagerly
+    loading the relationships in it.  Without ``expand``, ``default`` is
+    used, or if ``None``, the whole first level of relationships is eagerly
+    loaded and ``to_dict`` serializes all of them as before.
+    """
+    serializer = model.get_serializer()
+    value = request.args.get("expand")
+    if value is None and default is not None:
+        tree = default
+        options = serializer.loader_options(tree)
+    elif value is None:
+        tree = None
+        options = serializer.loader_options(
+            {key: {} for key in serializer.relationships}
+        )
+    else:
+        try:
+            tree = serializer.resolve_expand(
+                parse_expand(value, current_app.config["DJASK_API_MAX_EXPAND_DEPTH"])
+            )
+        except ValueError as e:
+            abort(400, str(e))
+        options = serializer.loader_options(tree)
+    return model.query.options(*options), tree
+
+
+def _has_relationships(model, expand) -> bool:
+    """Tell if the representation of an instance holds related instances."""
+    if expand is None:
+        return bool(model.get_serializer().relationships)
+    return bool(expand)
+
+
+def _related_versions(instance, expand) -> list:
+    """The model names, primary keys and ``updated_at`` of the instances
+    serialized along with ``instance``, in a stable order."""
+    serializer = type(instance).get_serializer()
+    tree = {key: None for key in serializer.relationships} if expand is None else expand
+    versions = []
+    for key in sorted(tree):
+        value = getattr(instance, key)
+        related = value if serializer.relationships[key][0] else [value]
+        for item in related:
+            if item is None:
+                continue
+            versions.append(
+                (
+                    type(item).__name__,
+                    sa.inspect(item).identity,
+                    getattr(item, "updated_at", None),
+                )
+            )
+            if tree[key]:
+                versions.extend(_related_versions(item, tree[key]))
+    return versions
+
+
+def _conditional_environ() -> dict:
+    """The environ of the request, with the ``If-None-Match`` tags stripped of
+    the content coding suffix of the compressed responses."""
+    etags = request.if_none_match
+    if not etags:
+        return request.environ
+    strong = etags.as_set()
+    weak = etags.as_set(include_weak=True) - strong
+    header = ETags(
+        [strip_coding(tag) for tag in strong],
+        [strip_coding(tag) for tag in weak],
+        etags.star_tag,
+    ).to_header()
+    return dict(request.environ, HTTP_IF_NONE_MATCH=header)
+
+
+def _not_modified(model, model_id: int) -> Response | None:
+    """Answer a conditional GET with a 304 response if the client's copy is
+    up to date, checking only the primary key and ``updated_at``.
+
+    Only used for the representations without related instances, whose
+    versions can't be checked without loading them."""
+    if not (request.if_none_match or request.if_modified_since):
+        return None
+    updated_at = getattr(model, "updated_at", None)
+    if updated_at is None:
+        return None
+    pk = model.get_meta().pk
+    row = db.session.query(updated_at).filter(pk == model_id).first()
+    if row is None:
+        abort(404)
+    etag = make_etag(model, (model_id,), row[0])
+    if is_resource_modified(_conditional_environ(), etag, last_modified=row[0]):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.last_modified = row[0]
+    return response
+
+
+def _respond(instance, expand) -> Response:
+    """Serialize an instance with its ``ETag`` and ``Last-Modified`` headers.
+
+    Both account for the related instances in the representation."""
+    response = jsonify(instance.to_dict(expand=expand))
+    updated_at = getattr(instance, "updated_at", None)
+    related = None
+    if _has_relationships(type(instance), expand):
+        related = _related_versions(instance, expand)
+        times = [v[2] for v in related if v[2] is not None]
+        if updated_at is not None and times:
+            updated_at = max(updated_at, *times)
+    response.set_etag(
+        make_etag(
+            type(instance),
+            sa.inspect(instance).identity,
+            getattr(instance, "updated_at", None),
+            related,
+        )
+    )
+    response.last_modified = updated_at
+    return response
+
+
+def _get(model, model_id: int) -> Response:
+    query, expand = _expand(model)
+    if not _has_relationships(model, expand):
+        response = _not_modified(model, model_id)
+        if response is not None:
+            return response
+    response = _respond(query.get_or_404(model_id), expand)
+    return response.make_conditional(_conditional_environ())
+
+
+def _check_if_match(instance) -> None:
+    """Abort with 412 if the ``If-Match`` precondition fails.
+
+    Writes only depend on the version of the instance, so an ETag matches
+    whatever the related instances of the representation it came from."""
+    if request.if_match:
+        etag = make_etag(
+            type(instance),
+            sa.inspect(instance).identity,
+            getattr(instance, "updated_at", None),
+        )
+        if request.if_match.star_tag:
+            return
+        if not any(
+            strip_coding(tag).split("-", 1)[0] == etag for tag in request.if_match
+        ):
+            abort(412)
+
+
+def _load_instance(model, data: Any, instance=None):
+    """Validate ``data`` against the cached schema of ``model`` and load it
+    into a new instance, or into ``instance`` if given."""
+    try:
+        return model.get_schema().load(
+            data,
+            session=db.session,
+            instance=instance,
+            partial=instance is not None,
+        )
+    except ValidationError as e:
+        abort(400, f"Invalid data for model {model.__name__}.", detail=e.messages)
+
+
 @admin_bp.route(
     "/user/<int:uid>",
     methods=(
@@ -24,16 +213,18 @@ admin_bp = APIBlueprint("admin_api", __name__)
 @admin_required_api
 def user_api(uid: int):
     if request.method == "GET":
-        return g.User.query.get(uid).to_dict()
+        return _get(g.User, uid)
 
     elif request.method == "PUT":
         user = g.User.query.get_or_404(uid)
+        _check_if_match(user)
         user.update(request.get_json())
-        user = g.User.query.get(uid)
-        return user.to_dict()
+        query, expand = _expand(g.User)
+        return _respond(query.get(uid), expand)
 
     elif request.method == "DELETE":  # pragma: no cover
         user = g.User.query.get_or_404(uid)
+        _check_if_match(user)
         db.session.delete(user)
         db.session.commit()
         return {}, 204
@@ -48,11 +239,44 @@ def create_user():
     return user.to_dict(), 201
 
 
+@admin_bp.post("/user/bulk")
+@admin_bp.doc(hide=True)
+@admin_required_api
+def create_users():
+    """Create users from a JSON array in a single transaction."""
+    try:
+        records = UserInSchema(many=True).load(request.get_json())
+    except ValidationError as e:
+        abort(400, "Invalid data for users.", detail=e.messages)
+    try:
+        users = g.User.create_users(records)
+    except IntegrityError as e:
+        db.session.rollback()
+        abort(400, "Failed to create the users.", detail=str(e.orig))
+    # the identity survives the expiry on commit, unlike ``user.id``
+    ids = [sa.inspect(user).identity[0] for user in users]
+    return {"created": len(users), "ids": ids}, 201
+
+
+def _token_response(user, refresh_token: str) -> Response:
+    expiration = current_app.config["DJASK_ACCESS_TOKEN_EXPIRES"]
+    response = jsonify(
+        {
+            "access_token": user.api_token(expiration),
+            "expires_in": expiration,
+            "refresh_token": refresh_token,
+        }
+    )
+    response.headers["Cache-Control"] = "no-store"
+    response.headers["Pragma"] = "no-cache"
+    return response
+
+
 @admin_bp.post("/token")
 @admin_bp.input(TokenInSchema, location="form")
 @admin_bp.output(TokenOutSchema)
 def get_token(data):
-    """Return the access token and expiration."""
+    """Return an access token, its expiration and a refresh token."""
     user = (
         g.User.query.filter_by(username=data["username"])
         .filter_by(is_admin=True)
@@ -60,16 +284,33 @@ def get_token(data):
     )
     if user is None or not user.check_password(data["password"]):
         abort(400, "Username or password invalid")
-    token = user.api_token()
-    response = jsonify(
-        {
-            "access_token": token,
-            "expires_in": 3600 * 24 * 7,
-        }
+    refresh_token = RefreshToken.issue(
+        user.id, current_app.config["DJASK_REFRESH_TOKEN_EXPIRES"]
     )
-    response.headers["Cache-Control"] = "no-store"
-    response.headers["Pragma"] = "no-cache"
-    return response
+    # also saves the hash if check_password upgraded it
+    db.session.commit()
+    return _token_response(user, refresh_token)
+
+
+@admin_bp.post("/token/refresh")
+@admin_bp.input(RefreshTokenInSchema, location="form")
+@admin_bp.output(TokenOutSchema)
+def refresh_token(data):
+    """Exchange a refresh token for a new access token and refresh token."""
+    rotated = RefreshToken.rotate(
+        data["refresh_token"], current_app.config["DJASK_REFRESH_TOKEN_EXPIRES"]
+    )
+    user = None
+    if rotated is not None:
+        user = g.User.query.get(rotated[0])
+        if user is None or not user.is_admin:
+            RefreshToken.revoke_user(rotated[0])
+            user = None
+    # commit the revocation of a reused token as well
+    db.session.commit()
+    if user is None:
+        abort(400, "Refresh token invalid")
+    return _token_response(user, rotated[1])
 
 
 @admin_bp.route(
@@ -85,39 +326,213 @@ def get_token(data):
 def model_api(model: str, model_id: int):
     if request.method == "GET":
         model = current_app.get_model_by_name(model)
-        instance = model.query.get_or_404(model_id)
-        return instance.to_dict()
+        return _get(model, model_id)
 
     elif request.method == "PUT":
         model = current_app.get_model_by_name(model)
         instance = model.query.get_or_404(model_id)
-        for attr, value in request.get_json().items():
-            if not hasattr(instance, attr):
-                abort(400, f"Model {model} has no attribute {attr}.")
-            instance.__setattr__(attr, value)
+        _check_if_match(instance)
+        _load_instance(model, request.get_json(), instance)
         db.session.commit()
-        instance = model.query.get(model_id)
-        return instance.to_dict()
+        query, expand = _expand(model)
+        return _respond(query.get(model_id), expand)
 
     elif request.method == "DELETE":  # pragma: no cover
         model = current_app.get_model_by_name(model)
         instance = model.query.get_or_404(model_id)
+        _check_if_match(instance)
         db.session.delete(instance)
         db.session.commit()
         return {}, 204
 
 
+@admin_bp.get("/<model>")
+@admin_bp.doc(hide=True)
+@admin_required_api
+def list_instances(model: str):
+    """List the instances of a model with keyset pagination."""
+    model = current_app.get_model_by_name(model)
+    per_page = request.args.get(
+        "per_page", current_app.config["DJASK_MODELS_PER_PAGE"], type=int
+    )
+    if not 0 < per_page <= current_app.config["DJASK_API_MAX_PER_PAGE"]:
+        abort(400, "Invalid page size.")
+    # a page only holds the foreign keys unless expanded, as serializing
+    # the nested relationships would query them instance by instance
+    query, expand = _expand(model, {})
+    try:
+        page = model.paginate_keyset(
+            cursor=request.args.get("cursor"),
+            per_page=per_page,
+            order_by=request.args.get("order_by", "id"),
+            query=query,
+        )
+    except ValueError as e:
+        abort(400, str(e))
+    return {
+        "items": [instance.to_dict(expand=expand) for instance in page],
+        "next": page.next_cursor,
+        "prev": page.prev_cursor,
+        "per_page": page.per_page,
+    }
+
+
+@admin_bp.get("/<model>/export")
+@admin_bp.doc(hide=True)
+@admin_required_api
+def export(model: str):
+    """Stream all the instances of a model as NDJSON or CSV."""
+    model = current_app.get_model_by_name(model)
+    try:
+        return export_model(model, request.args.get("format", "ndjson"))
+    except ValueError as e:
+        abort(400, str(e))
+
+
 @admin_bp.post("/<model>")
 @admin_bp.doc(hide=True)
 def post(model: str):
     """Create an instance of a model."""
     model = current_app.get_model_by_name(model)
-    instance = model()
-    for attr, value in request.get_json().items():
-        if attr not in [column.key for column in model.__table__.columns]:
-            abort(400, f"Model {model} has no attribute {attr}.")
-        instance.__setattr__(attr, value)
+    instance = _load_instance(model, request.get_json())
     db.session.add(instance)
     db.session.commit()
     instance = model.query.get(instance.id)
     return instance.to_dict(), 201
+
+
+@admin_bp.post("/<model>/bulk")
+@admin_bp.doc(hide=True)
+@admin_required_api
+def bulk_create(model: str):
+    """Create instances of a model from a JSON array in a single transaction.
+
+    The rows are validated and inserted in chunks of ``chunk_size`` rows with
+    ``executemany``.  Invalid rows are skipped and reported per chunk.
+    """
+    model = current_app.get_model_by_name(model)
+    rows = request.get_json()
+    if not isinstance(rows, list):
+        abort(400, "Expecting a JSON array of instances.")
+    chunk_size = request.args.get(
+        "chunk_size", current_app.config["DJASK_BULK_CHUNK_SIZE"], type=int
+    )
+    if chunk_size <= 0:
+        abort(400, "Invalid chunk size.")
+    loader = model.get_row_loader()
+    created = 0
+    chunks = []
+    try:
+        for start in range(0, len(rows), chunk_size):
+            mappings = []
+            errors = {}
+            end = start + chunk_size
+            for index, row in enumerate(rows[start:end], start):
+                try:
+                    mappings.append(loader.load(row))
+                except ValidationError as e:
+                    errors[index] = e.messages
+            db.session.bulk_insert_mappings(model, mappings)
+            record_changes(db.session, model)
+            created += len(mappings)
+            chunks.append({"start": start, "created": len(mappings), "errors": errors})
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        abort(400, f"Failed to insert {model.__name__} rows.", detail=str(e.orig))
+    if rows and not created:
+        abort(400, f"Invalid data for model {model.__name__}.", detail=chunks)
+    return {"created": created, "chunks": chunks}, 201
+
+
+def _flag(name: str) -> bool:
+    return request.args.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _bulk_filters(model, data) -> list:
+    if not isinstance(data, dict):
+        abort(400, "Expecting a JSON object.")
+    try:
+        return build_filters(model, data.get("filter"))
+    except ValueError as e:
+        abort(400, str(e))
+
+
+@admin_bp.patch("/<model>/bulk")
+@admin_bp.doc(hide=True)
+@admin_required_api
+def bulk_update(model: str):
+    """Update the instances of a model matching a filter with a single UPDATE.
+
+    The body is ``{"filter": {...}, "values": {...}}``, see
+    :func:`~djask.db.filters.build_filters`.  With ``dry_run``, only count the
+    matching instances.
+    """
+    model = current_app.get_model_by_name(model)
+    data = request.get_json()
+    query = model.query.filter(*_bulk_filters(model, data))
+    if _flag("dry_run"):
+        return {"matched": query.count()}
+    try:
+        values = model.get_schema(load_instance=False).load(
+            data.get("values"), partial=True
+        )
+    except ValidationError as e:
+        abort(400, f"Invalid data for model {model.__name__}.", detail=e.messages)
+    if not values:
+        abort(400, "Nothing to update.")
+    keys = sorted(c.key for c in model.get_meta().primary_key if c.key in values)
+    if keys:
+        abort(400, f"The primary key can't be updated in bulk: {', '.join(keys)}.")
+    try:
+        if issubclass(model, AbstractUser) and REVOKING_COLUMNS.intersection(values):
+            # the generation isn't bumped by the ORM events on bulk updates
+            bump_generations(model, query)
+        updated = query.update(values, synchronize_session=False)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        abort(400, f"Failed to update {model.__name__} rows.", detail=str(e.orig))
+    return {"updated": updated}
+
+
+@admin_bp.delete("/<model>/bulk")
+@admin_bp.doc(hide=True)
+@admin_required_api
+def bulk_delete(model: str):
+    """Delete the instances of a model matching a filter.
+
+    The body is ``{"filter": {...}}``, see :func:`~djask.db.filters.build_filters`.
+    The rows are deleted in chunks of ``chunk_size`` rows, each in its own
+    transaction, so the table is never locked for long.  With ``dry_run``,
+    only count the matching instances.
+    """
+    model = current_app.get_model_by_name(model)
+    conditions = _bulk_filters(model, request.get_json())
+    if _flag("dry_run"):
+        return {"matched": model.query.filter(*conditions).count()}
+    chunk_size = request.args.get(
+        "chunk_size", current_app.config["DJASK_BULK_CHUNK_SIZE"], type=int
+    )
+    if chunk_size <= 0:
+        abort(400, "Invalid chunk size.")
+    pk = model.get_meta().pk
+    deleted = 0
+    while True:
+        ids = [
+            row[0] for row in db.session.query(pk).filter(*conditions).limit(chunk_size)
+        ]
+        if not ids:
+            break
+        try:
+            deleted += model.query.filter(pk.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+        except IntegrityError as e:
+            # the chunks deleted before stay deleted
+            db.session.rollback()
+            abort(
+                400,
+                f"Failed to delete {model.__name__} rows, {deleted} were deleted.",
+                detail=str(e.orig),
+            )
+    return {"deleted": deleted}
@@ -1,10 +1,28 @@
+import csv
+import json
+import os
+import typing as t
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+
 import click
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
 
+from ..auth.models import RefreshToken
+from ..caching import record_changes
 from ..globals import current_app
 from .ui.views import admin_bp
 
+if t.TYPE_CHECKING:  # pragma: no cover
+    from ..app import Djask
+
+
+admin_bp.cli.help = "Create a super user, import data or purge tokens."
 
-admin_bp.cli.help = "Create a super user."
+# A parsed record, or the error message if it can't be parsed
+Parsed = t.Tuple[t.Optional[t.Dict[str, t.Any]], t.Optional[str]]
 
 
 @admin_bp.cli.command("create", help="Create a super user.")
@@ -23,3 +41,199 @@ def create_superuser(username: str, password: str):
     current_app.db.session.add(user)  # type: ignore
     current_app.db.session.commit()  # type: ignore
     click.echo(f"Superuser {username} created!")
+
+
+@admin_bp.cli.command(
+    "migrate-permissions", help="Convert permissions stored in the legacy format."
+)
+@click.option(
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of users updated in each transaction.",
+)
+def migrate_permissions(batch_size: int):
+    User = current_app.config["AUTH_MODEL"]
+    migrated = User.migrate_permissions(batch_size)
+    click.echo(f"Permissions of {migrated} users migrated.")
+
+
+@admin_bp.cli.command("purge-tokens", help="Delete the expired refresh tokens.")
+def purge_tokens():
+    purged = RefreshToken.purge_expired()
+    t.cast("Djask", current_app).db.session.commit()
+    click.echo(f"{purged} expired refresh tokens deleted.")
+
+
+def _parse_ndjson(lines: t.List[str]) -> t.List[Parsed]:
+    parsed: t.List[Parsed] = []
+    for line in lines:
+        try:
+            parsed.append((json.loads(line), None))
+        except ValueError as e:
+            parsed.append((None, str(e)))
+    return parsed
+
+
+def _parse_csv(header: t.List[str], lines: t.List[str]) -> t.List[Parsed]:
+    parsed: t.List[Parsed] = []
+    for row in csv.reader(lines):
+        if len(row) != len(header):
+            parsed.append((None, f"expected {len(header)} fields, got {len(row)}"))
+        else:
+            # empty CSV fields stand for NULL
+            parsed.append(({k: v or None for k, v in zip(header, row)}, None))
+    return parsed
+
+
+def _batches(items: t.Iterable, size: int) -> t.Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _parsed_batches(
+    file: t.TextIO, format: str, batch_size: int, offset: int, workers: int
+) -> t.Iterator[t.List[Parsed]]:
+    """Parse the records after ``offset`` in batches, in worker processes
+    if ``workers`` > 1.  The batches are yielded in order."""
+    if format == "csv":
+        header: t.List[str] = next(csv.reader([file.readline()]), [])
+        if workers == 1:
+            # csv.reader handles the fields spanning several lines
+            records = (
+                ({k: v or None for k, v in zip(header, row)}, None)
+                if len(row) == len(header)
+                else (None, f"expected {len(header)} fields, got {len(row)}")
+                for row in csv.reader(file)
+            )
+            yield from _batches(_skip(records, offset), batch_size)
+            return
+        lines: t.Iterable[str] = file
+        parse: t.Callable[..., t.List[Parsed]] = _parse_csv
+        args: tuple = (header,)
+    else:
+        lines = (line for line in file if line.strip())
+        parse = _parse_ndjson
+        args = ()
+    line_batches = _batches(_skip(lines, offset), batch_size)
+    if workers == 1:
+        for batch in line_batches:
+            yield parse(*args, batch)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        # keep a bounded number of batches in flight
+        pending: t.Deque[Future] = deque()
+        for batch in line_batches:
+            pending.append(executor.submit(parse, *args, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _skip(items: t.Iterable, count: int) -> t.Iterator:
+    iterator = iter(items)
+    for _ in zip(range(count), iterator):
+        pass
+    return iterator
+
+
+@admin_bp.cli.command("import", help="Import the instances of a model.")
+@click.argument("model")
+@click.argument("file", type=click.File("r", encoding="utf-8"), default="-")
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(["ndjson", "csv"]),
+    help="The format of the file, guessed from its extension by default.",
+)
+@click.option(
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of records inserted in each transaction.",
+)
+@click.option(
+    "--offset",
+    default=0,
+    type=click.IntRange(min=0),
+    help="The number of records to skip, to resume an interrupted import.",
+)
+@click.option(
+    "--map",
+    "mapping",
+    multiple=True,
+    metavar="FIELD=COLUMN",
+    help="Import a field of the file into a column with another name.",
+)
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of processes parsing the file. "
+    "With CSV, this needs every record to fit on a single line.",
+)
+def import_instances(
+    model: str,
+    file: t.TextIO,
+    format_: t.Optional[str],
+    batch_size: int,
+    offset: int,
+    mapping: t.Tuple[str, ...],
+    workers: int,
+):
+    """Import NDJSON or CSV records from FILE, or the standard input,
+    into MODEL.  Every batch of records is inserted in its own transaction,
+    and the offset to resume from is reported after each of them."""
+    app = t.cast("Djask", current_app)
+    model_class = app.model_registry.get(model)
+    if model_class is None:
+        raise click.BadParameter(f"Model {model} is not registered.")
+    if format_ is None:
+        _, ext = os.path.splitext(getattr(file, "name", ""))
+        format_ = "csv" if ext.lower() == ".csv" else "ndjson"
+    renames = {}
+    for item in mapping:
+        field, sep, column = item.partition("=")
+        if not sep:
+            raise click.BadParameter(f"Expecting FIELD=COLUMN, got {item}.")
+        renames[field] = column
+
+    db = app.db
+    loader = model_class.get_row_loader()
+    imported = failed = 0
+    for batch in _parsed_batches(file, format_, batch_size, offset, workers):
+        mappings = []
+        for index, (record, error) in enumerate(batch, offset):
+            if record is not None and renames:
+                record = {renames.get(k, k): v for k, v in record.items()}
+            try:
+                if record is None:
+                    raise ValidationError(error or "")
+                mappings.append(loader.load(record))
+            except ValidationError as e:
+                failed += 1
+                click.echo(f"Record {index} skipped: {e.messages}", err=True)
+        try:
+            db.session.bulk_insert_mappings(model_class, mappings)
+            record_changes(db.session, model_class)
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            raise click.ClickException(
+                f"The batch at offset {offset} was rolled back: {e.orig}. "
+                f"Fix it and resume with --offset {offset}."
+            )
+        imported += len(mappings)
+        offset += len(batch)
+        click.echo(f"Imported {imported} records, resume with --offset {offset}")
+    click.echo(f"Done: {imported} records imported, {failed} skipped.")
@@ -0,0 +1,117 @@
+"""
+Stream the rows of a model table as NDJSON or CSV.
+"""
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import decimal
+import io
+import json
+import typing as t
+
+from flask import Response
+from flask import stream_with_context
+
+from ..compression import AdaptiveCompress
+from ..compression import compress_stream
+from ..extensions import compress
+from ..extensions import db
+from ..globals import current_app
+from ..globals import request
+from ..types import ModelType
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# the size of the chunks sent to the client
+CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value: t.Any) -> t.Any:
+    if isinstance(value, (dt.date, dt.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_lines(columns: t.Sequence[str], rows: t.Iterable) -> t.Iterator[str]:
+    dumps = json.JSONEncoder(default=_json_default, ensure_ascii=False).encode
+    for row in rows:
+        yield dumps(dict(zip(columns, row))) + "\n"
+
+
+def _csv_lines(columns: t.Sequence[str], rows: t.Iterable) -> t.Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _chunks(lines: t.Iterable[str]) -> t.Iterator[bytes]:
+    pending: t.List[str] = []
+    size = 0
+    first = True
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        # the first line goes alone, so the client gets a byte right away
+        if size < CHUNK_SIZE and not first:
+            continue
+        first = False
+        yield "".join(pending).encode()
+        pending.clear()
+        size = 0
+    if pending:
+        yield "".join(pending).encode()
+
+
+def export_model(model: ModelType, format: str) -> Response:
+    """Stream all the rows of ``model`` in the given format.
+
+    The rows are fetched in batches of ``DJASK_EXPORT_BATCH_SIZE`` through a
+    server-side cursor where the database supports it, and gzipped on the
+    fly if the client accepts it, so the memory used doesn't depend on the
+    size of the table.
+
+    .. versionadded:: 0.7.0
+
+    :param model: The model to export
+    :param format: ``ndjson`` or ``csv``
+    :raises ValueError: if the format is not supported
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {format}.")
+    columns = model.get_serializer().columns
+    pk = model.get_meta().pk
+    rows = (
+        db.session.query(*(getattr(model, column) for column in columns))
+        .order_by(pk)
+        .yield_per(current_app.config["DJASK_EXPORT_BATCH_SIZE"])
+    )
+    lines = (_ndjson_lines if format == "ndjson" else _csv_lines)(columns, rows)
+    chunks = _chunks(lines)
+    gzip = request.accept_encodings.quality("gzip") > 0
+    if gzip:
+        chunks = compress_stream(
+            chunks,
+            "gzip",
+            compress.get_level("gzip", None, False),
+            AdaptiveCompress.get_stats(),
+        )
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[format])
+    response.headers[
+        "Content-Disposition"
+    ] = f"attachment; filename={model.__name__.lower()}.{format}"
+    response.headers["Cache-Control"] = "no-store"
+    response.vary.add("Accept-Encoding")
+    if gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
@@ -10,6 +10,7 @@ from flask_login import LoginManager
 from ..app import Blueprint
 from ..app import Djask
 from ..auth.anonymous import AnonymousUser
+from ..auth.identity import UserCache
 from ..extensions import csrf
 from ..types import ModeArg
 from ..types import ModeLiteral
@@ -19,13 +20,44 @@ from djask import current_app
 login_manager = LoginManager()
 
 
+def _user_cache() -> Optional[UserCache]:
+    if not current_app.config["DJASK_USER_CACHE_TTL"]:
+        return None
+    cache = current_app.extensions.get("djask_user_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "djask_user_cache",
+            UserCache(
+                current_app.config["DJASK_USER_CACHE_SIZE"],
+                current_app.config["DJASK_USER_CACHE_TTL"],
+            ),
+        )
+    return cache
+
+
 @login_manager.user_loader
 def load_user(
     user_id: str,  # according to flask-login's docs, the user_id is a string.
-):  # pragma: no cover
+):
+    """Load the user of a session.
+
+    .. versionchanged:: 0.7.0
+        The users are cached for ``DJASK_USER_CACHE_TTL`` seconds, or until
+        they are updated.
+    """
     if not user_id.isdecimal():
         return None
-    return current_app.config["AUTH_MODEL"].query.get(int(user_id))
+    model = current_app.config["AUTH_MODEL"]
+    cache = _user_cache()
+    key = (model, int(user_id))
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0]
+    user = model.query.get(int(user_id))
+    if cache is not None and user is not None:
+        cache.set(key, user)
+    return user
 
 
 class AdminModeError(Exception):
@@ -82,7 +114,7 @@ class Admin:
         login_manager.init_app(app)
         login_manager.anonymous_user = AnonymousUser
 
-        self.app.models.append(app.config["AUTH_MODEL"])
+        self.app.register_model(app.config["AUTH_MODEL"])
         custom_prefix = self.app.config.get("ADMIN_PREFIX")
         admin_prefix = custom_prefix or "/admin"
 
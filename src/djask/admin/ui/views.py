@@ -1,24 +1,29 @@
 import typing as t
 
+from flask import abort
 from flask import flash
 from flask import redirect
 from flask import render_template
 from flask import url_for
 from flask_login.utils import login_user
 from flask_login.utils import logout_user
-from sqlalchemy.orm.attributes import InstrumentedAttribute
 
 from ...blueprints import Blueprint
+from ...db.pagination import approximate_count
 from ...extensions import db
 from ...globals import current_app
 from ...globals import g
 from ...globals import request
 from ...helpers import get_model_form
+from ..export import export_model
 from .decorators import admin_required
 from .forms import LoginForm
 
 admin_bp = Blueprint("admin", __name__, template_folder="../../templates")
 
+# the number of instances counted exactly on the page of a model
+COUNT_LIMIT = 10000
+
 
 @admin_bp.route("/")
 @admin_required
@@ -45,6 +50,8 @@ def login():
         elif not user.check_password(form.password.data):
             flash("Wrong password.", "danger")
         else:
+            # save the hash if check_password upgraded it
+            db.session.commit()
             login_user(user, form.remember_me.data)
             next: t.Optional[str] = request.args.get("next")
             return redirect(next or url_for("admin.index"))
@@ -61,24 +68,45 @@ def logout():
 @admin_required
 def specific_model(model_name: str):
     model = current_app.get_model_by_name(model_name)  # type: ignore
-    schema = {}
-    for name, value in model.__dict__.items():
-        if isinstance(value, InstrumentedAttribute):
-            try:
-                type = value.type.__repr__()
-            except Exception:  # pragma: no cover
-                type = f"Relationship({value.prop.argument})"
-            schema[name] = type
-    instances = model.query.all()
+    meta = model.get_meta()
+    order_by = request.args.get("order_by", "id")
+    try:
+        page = model.paginate_keyset(
+            cursor=request.args.get("cursor"), order_by=order_by
+        )
+    except ValueError:
+        abort(400)
     return render_template(
         "djask-admin/model.html",
         model=model,
         model_name=model.__name__,
-        schema=schema,
-        instances=instances,
+        schema=meta.types,
+        page=page,
+        order_by=order_by,
+        sortable=meta.indexed,
+        # the indexed columns are shown to be sorted by
+        columns=[
+            (key, key.replace("_", " ").title())
+            for key in meta.columns
+            if key in meta.indexed
+            and key not in meta.hidden
+            and key not in ("id", "created_at", "updated_at")
+        ],
+        count=approximate_count(model, db.session, COUNT_LIMIT),
+        count_limit=COUNT_LIMIT,
     )
 
 
+@admin_bp.route("/<model_name>/export")
+@admin_required
+def export(model_name: str):
+    model = current_app.get_model_by_name(model_name)  # type: ignore
+    try:
+        return export_model(model, request.args.get("format", "csv"))
+    except ValueError:
+        abort(400)
+
+
 @admin_bp.route(
     "/<model_name>/add",
     methods=(
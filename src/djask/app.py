@@ -1,3 +1,4 @@
+import json
 import os
 import os.path as path
 import sys
@@ -9,12 +10,16 @@ from apiflask.exceptions import HTTPError
 from apispec import APISpec
 from flask import abort
 from flask import Blueprint
+from flask import Response
 from flask.helpers import get_debug_flag
 from flask.helpers import get_load_dotenv
 from werkzeug.serving import is_running_from_reloader
 
 from . import cli
+from .assets import asset_url
+from .assets import serve_asset
 from .auth.abstract import AbstractUser
+from .auth.hashing import DEFAULT_METHOD as DEFAULT_HASH_METHOD
 from .blueprints import Blueprint as DjaskBlueprint
 from .exceptions import InvalidAuthModelError
 from .extensions import bootstrap
@@ -22,23 +27,22 @@ from .extensions import compress
 from .extensions import csrf
 from .extensions import db
 from .extensions import login_manager
-from .globals import current_app as current_app
+from .globals import current_app as current_app  # noqa
 from .globals import g as g
 from .globals import request as request  # noqa
 from .globals import session as session  # noqa
 from .mixins import ModelFunctionalityMixin
+from .mixins import ViewCacheMixin
 from .types import Config
 from .types import ErrorResponse
 from .types import ModelType
 
 
 def _initialize_bootstrap_icons() -> str:
-    if current_app.debug:  # pragma: no cover
-        return "/djask/static/css/bootstrap-icons.css"
-    return "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.0/font/bootstrap-icons.css"
+    return asset_url("css/bootstrap-icons.css")
 
 
-class Djask(APIFlask, ModelFunctionalityMixin):
+class Djask(APIFlask, ModelFunctionalityMixin, ViewCacheMixin):
     """
     The djask object implements an APIFlask application and acts as a central object
     for all djask applications. You can refer to the flask documentation and the apiflask
@@ -85,10 +89,30 @@ class Djask(APIFlask, ModelFunctionalityMixin):
         djask_default_config = dict(
             SECRET_KEY="djask_secret_key",  # CHANGE THIS!!!
             ADMIN_SITE=False,
-            COMPRESS_LEVEL=9,
-            COMPRESS_BR_LEVEL=9,
+            COMPRESS_LEVEL=6,
+            COMPRESS_BR_LEVEL=5,
             SQLALCHEMY_TRACK_MODIFICATIONS=False,
             DJASK_MODELS_PER_PAGE=8,
+            DJASK_API_MAX_EXPAND_DEPTH=3,
+            DJASK_API_MAX_PER_PAGE=100,
+            DJASK_BULK_CHUNK_SIZE=1000,
+            DJASK_EXPORT_BATCH_SIZE=1000,
+            DJASK_SPEC_FILE=None,
+            DJASK_ASSETS_DIR=None,
+            DJASK_CACHE_BACKEND="memory",
+            DJASK_CACHE_LOCATION=None,
+            DJASK_CACHE_SIZE=1024,
+            DJASK_CACHE_TIMEOUT=300,
+            DJASK_ACCESS_TOKEN_EXPIRES=3600,
+            DJASK_REFRESH_TOKEN_EXPIRES=3600 * 24 * 30,
+            DJASK_TOKEN_CACHE_SIZE=1024,
+            DJASK_TOKEN_CACHE_TTL=60,
+            DJASK_TOKEN_CLAIMS=False,
+            DJASK_USER_CACHE_SIZE=1024,
+            DJASK_USER_CACHE_TTL=60,
+            DJASK_TOKEN_GENERATION_TTL=30,
+            DJASK_PASSWORD_HASH_METHOD=DEFAULT_HASH_METHOD,
+            DJASK_PASSWORD_HASH_WORKERS=max(1, (os.cpu_count() or 2) // 2),
             DOCS_FAVICON="/djask" + (self.static_url_path or "") + "/icon/djask.ico",
         )
         for k, v in djask_default_config.items():
@@ -106,6 +130,12 @@ class Djask(APIFlask, ModelFunctionalityMixin):
             raise InvalidAuthModelError
 
         self.jinja_env.globals["djask_bootstrap_icons"] = _initialize_bootstrap_icons
+        self.jinja_env.globals["djask_asset"] = asset_url
+
+        # spec format -> (registry version, spec, serialized spec)
+        self._spec_cache: t.Dict[str, t.Tuple[int, t.Any, t.Optional[bytes]]] = {}
+        if "openapi.spec" in self.view_functions:
+            self.view_functions["openapi.spec"] = self._spec_view
 
         self._register_extensions()
         self._register_static_files()
@@ -132,6 +162,8 @@ class Djask(APIFlask, ModelFunctionalityMixin):
         """Register the built-in static files
 
         .. versionadded:: 0.1.0
+        .. versionchanged:: 0.7.0
+            Serve them fingerprinted and precompressed under ``/djask/assets``.
         """
         static = Blueprint(
             "djask",
@@ -142,6 +174,9 @@ class Djask(APIFlask, ModelFunctionalityMixin):
                 path.join(path.dirname(__file__), "templates")
             ),
         )
+        static.add_url_rule(
+            "/djask/assets/<path:filename>", "asset", view_func=serve_asset
+        )
         self.register_blueprint(blueprint=static)
 
     def _register_global_user_model(self) -> None:
@@ -175,6 +210,9 @@ class Djask(APIFlask, ModelFunctionalityMixin):
 
         .. versionadded:: 0.1.0
         .. versionchanged:: 0.3.2
+        .. versionchanged:: 0.7.0
+            Index the models of Djask blueprints in the app's model registry.
+
             :param blueprint: the blueprint object to register
             :param options: other options such as url_prefix
         """
@@ -192,21 +230,24 @@ class Djask(APIFlask, ModelFunctionalityMixin):
         ]
         if all(conditions):
             self.blueprint_objects.append(blueprint)
+        if isinstance(blueprint, ModelFunctionalityMixin):
+            blueprint.model_registry.attach(
+                self.model_registry, options.get("name", blueprint.name)
+            )
 
     def get_model_by_name(self, name: str) -> ModelType:
         """Get a model registered by name.
 
         .. versionadded:: 0.2.0
+        .. versionchanged:: 0.7.0
+            Look the model up in the indexed model registry.
+
             :param name: the model name to get
         """
-        name = name.lower()
-        models = self.models
-        for bp in self.blueprint_objects:
-            models.extend(bp.models)  # type: ignore
-        registered_models = [model.__name__.lower() for model in models]
-        if name not in registered_models:
+        model = self.model_registry.get(name)
+        if model is None:
             abort(404, "Data model not defined or registered.")
-        return models[registered_models.index(name)]
+        return model
 
     def run(
         self,
@@ -316,7 +357,7 @@ class Djask(APIFlask, ModelFunctionalityMixin):
         custom_prefix = self.config.get("ADMIN_PREFIX")
         prefix = custom_prefix if isinstance(custom_prefix, str) else "/admin"
 
-        for m in set(self.models):
+        for m in self.model_registry:
             m_name = m.__name__
 
             # register the schema to spec
@@ -396,3 +437,74 @@ class Djask(APIFlask, ModelFunctionalityMixin):
                 ),
             )
         return spec
+
+    def _get_spec(
+        self, spec_format: t.Optional[str] = None, force_update: bool = False
+    ) -> t.Union[dict, str]:
+        """Get the spec, generated once per format until a model is registered.
+
+        If ``DJASK_SPEC_FILE`` points to a spec written by ``djask spec``,
+        it is loaded instead of generated.
+
+        .. versionadded:: 0.7.0
+        """
+        return self._get_cached_spec(spec_format, force_update)[1]
+
+    def get_spec_bytes(self, spec_format: t.Optional[str] = None) -> bytes:
+        """Get the serialized spec, cached along with the spec.
+
+        .. versionadded:: 0.7.0
+
+        :param spec_format: ``json`` or ``yaml``, ``SPEC_FORMAT`` by default
+        """
+        spec_format = self._spec_format(spec_format)
+        version, spec, data = self._get_cached_spec(spec_format)
+        if data is None:
+            if spec_format == "json":
+                data = json.dumps(
+                    spec, indent=self.config["LOCAL_SPEC_JSON_INDENT"] or None
+                ).encode()
+            else:
+                data = str(spec).encode()
+            self._spec_cache[spec_format] = (version, spec, data)
+        return data
+
+    def _spec_format(self, spec_format: t.Optional[str]) -> str:
+        spec_format = spec_format or self.config["SPEC_FORMAT"]
+        return "yaml" if spec_format == "yml" else spec_format
+
+    def _get_cached_spec(
+        self, spec_format: t.Optional[str] = None, force_update: bool = False
+    ) -> t.Tuple[int, t.Any, t.Optional[bytes]]:
+        spec_format = self._spec_format(spec_format)
+        version = self.model_registry.version
+        cached = self._spec_cache.get(spec_format)
+        if cached is None or cached[0] != version or force_update:
+            cached = None if force_update else self._load_spec_file(spec_format)
+            if cached is None:
+                # APIFlask keeps the last generated spec in ``_spec``
+                spec = super()._get_spec(spec_format, force_update=True)
+                cached = (version, spec, None)
+            self._spec_cache[spec_format] = cached
+        return cached
+
+    def _load_spec_file(
+        self, spec_format: str
+    ) -> t.Optional[t.Tuple[int, t.Any, t.Optional[bytes]]]:
+        spec_file = self.config["DJASK_SPEC_FILE"]
+        if not spec_file:
+            return None
+        ext = path.splitext(spec_file)[1].lower()
+        if (ext == ".json") != (spec_format == "json"):
+            return None
+        with open(spec_file, "rb") as f:
+            data = f.read()
+        spec = json.loads(data) if spec_format == "json" else data.decode()
+        return self.model_registry.version, spec, data
+
+    def _spec_view(self) -> Response:
+        spec_format = self._spec_format(None)
+        mimetype = self.config[
+            "JSON_SPEC_MIMETYPE" if spec_format == "json" else "YAML_SPEC_MIMETYPE"
+        ]
+        return Response(self.get_spec_bytes(spec_format), mimetype=mimetype)
@@ -0,0 +1,233 @@
+"""
+Serve the built-in static files fingerprinted and precompressed.
+
+Each file is served under a name carrying a digest of its content, with its
+gzip and brotli variants compressed once, so the responses can be cached
+forever and are never compressed on the request path.  The assets are built
+on first use, or loaded from ``DJASK_ASSETS_DIR``, where ``djask assets``
+writes them at build time.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import mimetypes
+import os
+import os.path as path
+import re
+import threading
+import typing as t
+from hashlib import sha256
+
+import brotli
+from flask import abort
+from flask import Response
+from flask import url_for
+
+from .globals import current_app
+from .globals import request
+
+STATIC_FOLDER = path.join(path.dirname(__file__), "static")
+MANIFEST = "manifest.json"
+# the types that are worth compressing, fonts like woff2 already are
+COMPRESSIBLE = frozenset((".css", ".js", ".svg", ".ico"))
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# content coding -> file suffix, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+# the types missing from the mimetypes database of some systems
+MIMETYPES = {".woff2": "font/woff2"}
+
+_URL_RE = re.compile(r"""url\((["']?)\./([^"')?#]+)[^"')]*\1\)""")
+_lock = threading.Lock()
+
+
+class Asset(t.NamedTuple):
+    """A fingerprinted asset.
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: The fingerprinted path, relative to the static folder
+    path: str
+    mimetype: str
+    #: The digest of the content, also used as the ETag
+    digest: str
+    #: content coding -> body, ``identity`` is always there
+    variants: dict[str, bytes]
+
+
+def _fingerprint(filename: str, digest: str) -> str:
+    root, ext = path.splitext(filename)
+    return f"{root}.{digest}{ext}"
+
+
+def _compress(data: bytes) -> dict[str, bytes]:
+    variants = {"identity": data}
+    compressed = {
+        "br": brotli.compress(data, quality=11),
+        "gzip": gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    for encoding, body in compressed.items():
+        if len(body) < len(data):
+            variants[encoding] = body
+    return variants
+
+
+def build_assets(folder: str = STATIC_FOLDER) -> dict[str, Asset]:
+    """Fingerprint and compress the files of a folder.
+
+    The relative ``url(./...)`` references of the stylesheets are rewritten
+    to the fingerprinted names.
+
+    .. versionadded:: 0.7.0
+
+    :param folder: The static folder
+    :return: A mapping of the original paths to the assets
+    """
+    filenames = sorted(
+        path.relpath(path.join(root, name), folder).replace(os.sep, "/")
+        for root, _, names in os.walk(folder)
+        for name in names
+    )
+    assets: dict[str, Asset] = {}
+    # the stylesheets go last to reference the fingerprinted files
+    for filename in sorted(filenames, key=lambda name: name.endswith(".css")):
+        with open(path.join(folder, filename), "rb") as f:
+            data = f.read()
+        if filename.endswith(".css"):
+            directory = path.dirname(filename)
+
+            def replace(match: re.Match) -> str:
+                target = path.join(directory, match.group(2)).replace(os.sep, "/")
+                asset = assets.get(target)
+                if asset is None:
+                    return match.group(0)
+                return f'url("./{path.relpath(asset.path, directory or ".")}")'
+
+            data = _URL_RE.sub(replace, data.decode()).encode()
+        digest = sha256(data).hexdigest()[:12]
+        ext = path.splitext(filename)[1].lower()
+        assets[filename] = Asset(
+            _fingerprint(filename, digest),
+            MIMETYPES.get(ext)
+            or mimetypes.guess_type(filename)[0]
+            or "application/octet-stream",
+            digest,
+            _compress(data) if ext in COMPRESSIBLE else {"identity": data},
+        )
+    return assets
+
+
+def write_assets(assets: dict[str, Asset], output: str) -> None:
+    """Write assets, their compressed variants and a manifest to a folder.
+
+    .. versionadded:: 0.7.0
+    """
+    manifest = {}
+    for filename, asset in assets.items():
+        target = path.join(output, asset.path)
+        os.makedirs(path.dirname(target), exist_ok=True)
+        for encoding, body in asset.variants.items():
+            with open(target + ENCODINGS.get(encoding, ""), "wb") as f:
+                f.write(body)
+        manifest[filename] = {
+            "path": asset.path,
+            "mimetype": asset.mimetype,
+            "digest": asset.digest,
+            "encodings": sorted(asset.variants),
+        }
+    with open(path.join(output, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def load_assets(folder: str) -> dict[str, Asset]:
+    """Load the assets written by :func:`write_assets`.
+
+    .. versionadded:: 0.7.0
+    """
+    with open(path.join(folder, MANIFEST)) as f:
+        manifest = json.load(f)
+    assets = {}
+    for filename, entry in manifest.items():
+        variants = {}
+        for encoding in entry["encodings"]:
+            suffix = ENCODINGS.get(encoding, "")
+            with open(path.join(folder, entry["path"] + suffix), "rb") as f:
+                variants[encoding] = f.read()
+        assets[filename] = Asset(
+            entry["path"], entry["mimetype"], entry["digest"], variants
+        )
+    return assets
+
+
+def get_assets() -> dict[str, Asset]:
+    """Get the assets of the current app, built or loaded on first use.
+
+    When ``DJASK_ASSETS_DIR`` is set but holds no assets yet, the built
+    assets are written there.
+
+    .. versionadded:: 0.7.0
+    """
+    assets = current_app.extensions.get("djask_assets")
+    if assets is None:
+        with _lock:
+            assets = current_app.extensions.get("djask_assets")
+            if assets is None:
+                folder = current_app.config["DJASK_ASSETS_DIR"]
+                if folder and path.exists(path.join(folder, MANIFEST)):
+                    assets = load_assets(folder)
+                else:
+                    assets = build_assets()
+                    if folder:
+                        write_assets(assets, folder)
+                current_app.extensions["djask_assets"] = assets
+                # the fingerprinted path -> asset, for the view
+                current_app.extensions["djask_asset_paths"] = {
+                    asset.path: asset for asset in assets.values()
+                }
+    return assets
+
+
+def asset_url(filename: str) -> str:
+    """Get the url of a built-in static file.
+
+    The fingerprinted asset is used unless the app is in debug mode, where
+    the files are served as they are so the changes show up.
+
+    .. versionadded:: 0.7.0
+
+    :param filename: The path of the file in the static folder
+    """
+    if current_app.debug:
+        return url_for("djask.static", filename=filename)
+    asset = get_assets().get(filename)
+    if asset is None:
+        return url_for("djask.static", filename=filename)
+    return url_for("djask.asset", filename=asset.path)
+
+
+def serve_asset(filename: str) -> Response:
+    """Serve a fingerprinted asset in the best encoding the client accepts.
+
+    .. versionadded:: 0.7.0
+    """
+    get_assets()
+    asset = current_app.extensions["djask_asset_paths"].get(filename)
+    if asset is None:
+        abort(404)
+    encoding = next(
+        (
+            encoding
+            for encoding in ENCODINGS
+            if encoding in asset.variants and encoding in request.accept_encodings
+        ),
+        "identity",
+    )
+    response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.vary.add("Accept-Encoding")
+    response.set_etag(f"{asset.digest}-{encoding}")
+    response.make_conditional(request)
+    return response
@@ -1,24 +1,40 @@
 from __future__ import annotations
 
+import json
 from base64 import b64decode
-from base64 import b64encode
 from time import time
 from typing import Any
+from typing import FrozenSet
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
 from warnings import warn
+from weakref import WeakKeyDictionary
 
 import sqlalchemy as sa
 from apiflask.exceptions import abort
 from authlib.jose import jwt
 from flask_login.mixins import UserMixin
 from sqlalchemy.ext.declarative import AbstractConcreteBase
-from werkzeug.security import check_password_hash
-from werkzeug.security import generate_password_hash
+from sqlalchemy.orm import Mapper
 
+from ..caching import record_changes
 from ..extensions import db
+from .hashing import get_hasher
 from .permission import Permission
 from .permission import PermissionExistingWarning
 
 
+# user model -> the permissions granted to all its users
+_default_permissions: WeakKeyDictionary[type, FrozenSet[str]] = WeakKeyDictionary()
+
+
+@sa.event.listens_for(Mapper, "after_configured")
+def _clear_default_permissions() -> None:
+    # new models bring new default permissions
+    _default_permissions.clear()
+
+
 class AbstractUser(AbstractConcreteBase, UserMixin):
     """
     A base class for all user models.
@@ -33,6 +49,12 @@ class AbstractUser(AbstractConcreteBase, UserMixin):
     .. versionadded:: 0.1.0
     """
 
+    #: The permissions on every model granted to all the users,
+    #: e.g. ``("read",)`` grants ``<table>_read`` on every table.
+    #:
+    #: .. versionadded:: 0.7.0
+    default_permissions: Tuple[str, ...] = ("read",)
+
     __table_args__ = {"extend_existing": True}
     username = sa.Column(sa.String(128), index=True, unique=True)
     name = sa.Column(sa.String(128))
@@ -41,13 +63,6 @@ class AbstractUser(AbstractConcreteBase, UserMixin):
     permissions = sa.Column(sa.Text)
     is_admin = sa.Column(sa.Boolean, default=False)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for mapper in db.Model.registry.mappers:
-            print(mapper.class_.__tablename__)
-            self.add_permission(Permission(mapper.class_.__tablename__, "read"))
-        db.session.commit()
-
     def __repr__(self):  # pragma: no cover
         return f"<User {self.username}>"
 
@@ -57,28 +72,47 @@ class AbstractUser(AbstractConcreteBase, UserMixin):
         :param password: The password to set
         .. versionadded:: 0.1.0
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_hasher().hash(password)
 
     def check_password(self, password: str) -> bool:
         """Check if the password is correct.
 
+        If it is, and the stored hash was made with another method or cost
+        than ``DJASK_PASSWORD_HASH_METHOD``, the password is hashed again.
+        The new hash is saved with the next commit.
+
         :param password: The password to check
         .. versionadded:: 0.1.0
+        .. versionchanged:: 0.7.0
+            Rehash outdated hashes.
         """
-        return check_password_hash(self.password_hash, password)
+        hasher = get_hasher()
+        if self.password_hash is None or not hasher.check(self.password_hash, password):
+            return False
+        if hasher.needs_rehash(self.password_hash):
+            self.password_hash = hasher.hash(password)
+        return True
 
     def api_token(self, expiration=3600 * 24 * 7) -> str:
         """Generate a new API token for the user.
 
+        With ``DJASK_TOKEN_CLAIMS``, the token also carries the claims used
+        to authorize admin API requests without loading the user.
+
         :param expiration: The expiration time of the token in seconds
         :returns: The API token
         .. versionadded:: 0.3.0
         .. versionchanged:: 0.4.2
+        .. versionchanged:: 0.7.0
+            Add the claims.
         """
         from ..globals import current_app  # noreorder
+        from .claims import make_claims
 
         header = {"alg": "HS256"}
         data = {"id": self.id, "created": time(), "expiration": expiration}
+        if current_app.config["DJASK_TOKEN_CLAIMS"]:
+            data.update(make_claims(self))
         return jwt.encode(header, data, current_app.config["SECRET_KEY"]).decode()
 
     def update(self, data: dict[str, Any]) -> None:
@@ -99,18 +133,146 @@ class AbstractUser(AbstractConcreteBase, UserMixin):
         db.session.add(self)
         db.session.commit()
 
+    @property
+    def permission_set(self) -> FrozenSet[str]:
+        """The permissions of the user, parsed once per value of
+        :attr:`permissions`.
+
+        .. versionadded:: 0.7.0
+        """
+        raw = self.permissions
+        cached = self.__dict__.get("_permission_cache")
+        if cached is None or cached[0] is not raw:
+            cached = (raw, frozenset(parse_permissions(raw)))
+            self.__dict__["_permission_cache"] = cached
+        return cached[1]
+
+    @classmethod
+    def get_default_permissions(cls) -> FrozenSet[str]:
+        """The permissions granted by :attr:`default_permissions`, computed
+        once until new models are mapped.
+
+        .. versionadded:: 0.7.0
+        """
+        perms = _default_permissions.get(cls)
+        if perms is None:
+            perms = _default_permissions[cls] = frozenset(
+                Permission(mapper.class_, name)
+                for mapper in db.Model.registry.mappers
+                for name in cls.default_permissions
+            )
+        return perms
+
     def has_permission(self, perm: Permission) -> bool:
-        """Check if a permission is in a user's permissions"""
-        return perm in (
-            b64decode(bytes(self_permission_b64, encoding="utf-8")).decode()
-            for self_permission_b64 in self.permissions.split(",")
-        )
+        """Check if a permission is in a user's permissions
+
+        .. versionchanged:: 0.7.0
+            The :attr:`default_permissions` are granted at check time
+            instead of being stored for every user.
+        """
+        return perm in self.permission_set or perm in self.get_default_permissions()
 
     def add_permission(self, perm: Permission) -> None:
         """Add a permission to a user"""
-        if self.permissions is not None and self.has_permission(perm):
-            warn(PermissionExistingWarning(self.username, perm))
-        to_append = b64encode(bytes(perm, encoding="utf-8")).decode() + ","
-        self.permissions = (
-            "" if self.permissions is None else self.permissions + to_append
+        self.add_permissions((perm,))
+
+    def add_permissions(self, perms: Iterable[Permission]) -> None:
+        """Add several permissions to a user at once.
+
+        .. versionadded:: 0.7.0
+        """
+        current = self.permission_set
+        new = set()
+        for perm in perms:
+            if perm in new or self.has_permission(perm):
+                warn(PermissionExistingWarning(self.username, perm))
+            else:
+                new.add(perm)
+        if new:
+            self.permissions = dump_permissions(current | new)
+
+    @classmethod
+    def create_users(cls, records: Iterable[dict[str, Any]]) -> list[AbstractUser]:
+        """Create users in a single transaction.
+
+        .. versionadded:: 0.7.0
+
+        :param records: The column values of the users, with their
+            ``password`` instead of the password hash
+        :return: The created users
+        """
+        users = []
+        passwords = []
+        for record in records:
+            record = dict(record)
+            password = record.pop("password", None)
+            users.append(cls(**record))
+            if password is not None:
+                passwords.append((users[-1], password))
+        # the hashes are computed side by side on the hashing pool
+        hashes = get_hasher().hash_many(password for _, password in passwords)
+        for (user, _), pwhash in zip(passwords, hashes):
+            user.password_hash = pwhash
+        db.session.add_all(users)
+        db.session.commit()
+        return users
+
+    @classmethod
+    def migrate_permissions(cls, batch_size: int = 1000) -> int:
+        """Rewrite the permissions stored in the legacy base64 format.
+
+        .. versionadded:: 0.7.0
+
+        :param batch_size: The number of users updated in each transaction
+        :return: The number of users migrated
+        """
+        migrated = 0
+        pk = getattr(cls, cls.get_meta().pk.key)  # type: ignore
+        query = (
+            db.session.query(pk, cls.permissions)
+            .filter(cls.permissions.isnot(None), ~cls.permissions.startswith("["))
+            .order_by(pk)
         )
+        last_id = None
+        while True:
+            batch_query = query if last_id is None else query.filter(pk > last_id)
+            rows = batch_query.limit(batch_size).all()
+            if not rows:
+                return migrated
+            db.session.bulk_update_mappings(
+                cls,
+                [
+                    {
+                        pk.key: id,
+                        "permissions": dump_permissions(parse_permissions(raw)),
+                    }
+                    for id, raw in rows
+                ],
+            )
+            record_changes(db.session, cls)
+            db.session.commit()
+            migrated += len(rows)
+            last_id = rows[-1][0]
+
+
+def parse_permissions(raw: Optional[str]) -> list[str]:
+    """Parse the ``permissions`` column of a user.
+
+    The permissions are stored as a JSON list, or in the legacy format of
+    base64-encoded names each followed by a comma.
+
+    .. versionadded:: 0.7.0
+    """
+    if not raw:
+        return []
+    if raw.startswith("["):
+        return json.loads(raw)
+    return [b64decode(item).decode() for item in raw.split(",") if item]
+
+
+def dump_permissions(perms: Iterable[str]) -> str:
+    """Serialize permissions for the ``permissions`` column of a user.
+
+    .. versionadded:: 0.7.0
+    """
+    return json.dumps(sorted(perms))
@@ -0,0 +1,242 @@
+"""
+Authorize admin API requests from the claims of their token.
+
+With ``DJASK_TOKEN_CLAIMS``, :meth:`~djask.auth.abstract.AbstractUser.api_token`
+signs the admin flag, a digest of the permissions and the token generation of
+the user into the token.  A request is then authorized from the token alone,
+as long as the generation is still the one of the user.  The generations are
+kept in their own table, :class:`~djask.auth.models.TokenGeneration`, and
+cached, and a change of ``is_admin`` or ``permissions`` bumps the generation,
+which revokes the tokens issued before.
+"""
+from __future__ import annotations
+
+import typing as t
+from hashlib import sha256
+from time import time
+from weakref import WeakSet
+
+import sqlalchemy as sa
+from authlib.jose import JoseError
+from authlib.jose import jwt
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..globals import current_app
+from ..globals import g
+from ..ttl import TTLCache
+from .abstract import AbstractUser
+from .abstract import dump_permissions
+from .models import TokenGeneration
+
+#: The version of the claims, bumped when their meaning changes
+CLAIMS_VERSION = 1
+# the columns whose change revokes the tokens of a user
+REVOKING_COLUMNS = frozenset(("is_admin", "permissions"))
+
+_generation_caches: WeakSet[TTLCache] = WeakSet()
+
+
+def permission_digest(user: AbstractUser) -> str:
+    """A short digest of the permissions of a user."""
+    return sha256(dump_permissions(user.permission_set).encode()).hexdigest()[:16]
+
+
+def make_claims(user: AbstractUser) -> dict[str, t.Any]:
+    """The claims put into the tokens of a user."""
+    return {
+        "v": CLAIMS_VERSION,
+        "admin": bool(user.is_admin),
+        "perms": permission_digest(user),
+        "gen": _load_generation(type(user), sa.inspect(user).identity[0]) or 0,
+    }
+
+
+def _claims_cache() -> TTLCache:
+    cache = current_app.extensions.get("djask_token_claims")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "djask_token_claims",
+            TTLCache(
+                current_app.config["DJASK_TOKEN_CACHE_SIZE"],
+                current_app.config["DJASK_TOKEN_CACHE_TTL"],
+            ),
+        )
+    return cache
+
+
+def _generation_cache() -> TTLCache:
+    cache = current_app.extensions.get("djask_token_generations")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "djask_token_generations",
+            TTLCache(
+                current_app.config["DJASK_TOKEN_CACHE_SIZE"],
+                current_app.config["DJASK_TOKEN_GENERATION_TTL"],
+            ),
+        )
+        _generation_caches.add(cache)
+    return cache
+
+
+def decode_claims(token: str) -> dict[str, t.Any] | None:
+    """Verify a token and return its claims, cached by the digest of the token.
+
+    :return: The claims, or ``None`` if the token is invalid or expired
+    """
+    cache = _claims_cache()
+    key = sha256(token.encode()).digest()
+    data = cache.get(key)
+    if data is not None:
+        return data
+    try:
+        data = dict(jwt.decode(token.encode("ascii"), current_app.config["SECRET_KEY"]))
+    except (ValueError, JoseError):
+        return None
+    current = time()
+    remaining: float = int(data.get("created", current)) + int(
+        data.get("expiration", -1)
+    )
+    remaining -= current
+    if remaining <= 0:
+        return None
+    if cache.ttl:
+        cache.set(key, data, ttl=min(remaining, cache.ttl))
+    return data
+
+
+def token_generation(model: t.Type[AbstractUser], user_id: t.Any) -> int | None:
+    """Get the token generation of a user, cached for
+    ``DJASK_TOKEN_GENERATION_TTL`` seconds.
+
+    :return: The generation, or ``None`` if the user doesn't exist
+    """
+    cache = _generation_cache()
+    key = (model, user_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = _load_generation(model, user_id)
+        if generation is None:
+            return None
+        if cache.ttl:
+            cache.set(key, generation)
+    return generation
+
+
+def _load_generation(model: t.Type[AbstractUser], user_id: t.Any) -> int | None:
+    # None if the user doesn't exist, 0 if it has no generation yet
+    pk = getattr(model, model.get_meta().pk.key)  # type: ignore
+    return (
+        db.session.query(sa.func.coalesce(TokenGeneration.generation, 0))
+        .select_from(model)
+        .outerjoin(TokenGeneration, TokenGeneration.user_id == pk)
+        .filter(pk == user_id)
+        .scalar()
+    )
+
+
+def bump_generations(model: t.Type[AbstractUser], query: t.Any) -> None:
+    """Bump the token generation of the users matched by a query, for the
+    bulk updates the ORM events don't see.  The caller commits.
+
+    :param model: The user model
+    :param query: A query of ``model``
+    """
+    pk = getattr(model, model.get_meta().pk.key)  # type: ignore
+    ids = query.with_entities(pk).order_by(None)
+    db.session.query(TokenGeneration).filter(TokenGeneration.user_id.in_(ids)).update(
+        {TokenGeneration.generation: TokenGeneration.generation + 1},
+        synchronize_session=False,
+    )
+    missing = ids.filter(
+        ~pk.in_(db.session.query(TokenGeneration.user_id))
+    ).with_entities(pk, sa.literal(1))
+    db.session.execute(
+        sa.insert(TokenGeneration).from_select(
+            ["user_id", "generation"], missing.statement
+        )
+    )
+
+
+def authorize_admin(token: str | None) -> bool | None:
+    """Authorize an admin API request from the claims of its token.
+
+    :return: ``True`` if the token proves the user is an admin, ``False`` if
+        it proves the contrary or has been revoked, and ``None`` if it has no
+        claims to decide from
+    """
+    if not token:
+        return None
+    data = decode_claims(token)
+    if data is None or data.get("v") != CLAIMS_VERSION:
+        return None
+    if not data.get("admin"):
+        return False
+    return token_generation(g.User, data.get("id")) == data.get("gen")
+
+
+@sa.event.listens_for(AbstractUser, "before_update", propagate=True)
+def _bump_generation(mapper, connection, target) -> None:
+    state = sa.inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in REVOKING_COLUMNS):
+        table = sa.inspect(TokenGeneration).local_table
+        user_id = state.identity[0]
+        bumped = connection.execute(
+            table.update()
+            .where(table.c.user_id == user_id)
+            .values(generation=table.c.generation + 1)
+        )
+        if not bumped.rowcount:
+            connection.execute(table.insert().values(user_id=user_id, generation=1))
+
+
+def _discard(changes: t.Iterable[tuple[type, t.Any]]) -> None:
+    # (model, user id), or (model, None) for all the users of a model
+    for cache in list(_generation_caches):
+        for model, user_id in changes:
+            if user_id is None:
+                cache.discard_if(lambda key, _: key[0] is model)
+            else:
+                cache.pop((model, user_id))
+
+
+def _record(session: Session | None, model: type, user_id: t.Any) -> None:
+    # the generations are dropped at once, and again on commit, as a request
+    # may cache the former one until then
+    _discard([(model, user_id)])
+    if session is not None:
+        changed = session.info.setdefault("djask_changed_generations", set())
+        changed.add((model, user_id))
+
+
+@sa.event.listens_for(AbstractUser, "after_update", propagate=True)
+@sa.event.listens_for(AbstractUser, "after_delete", propagate=True)
+def _discard_generation(mapper, connection, target) -> None:
+    _record(object_session(target), mapper.class_, sa.inspect(target).identity[0])
+
+
+@sa.event.listens_for(AbstractUser, "after_delete", propagate=True)
+def _delete_generation(mapper, connection, target) -> None:
+    table = sa.inspect(TokenGeneration).local_table
+    connection.execute(
+        table.delete().where(table.c.user_id == sa.inspect(target).identity[0])
+    )
+
+
+@sa.event.listens_for(Session, "after_bulk_update")
+@sa.event.listens_for(Session, "after_bulk_delete")
+def _discard_generations(context) -> None:
+    model = context.mapper.class_
+    if issubclass(model, AbstractUser):
+        _record(context.session, model, None)
+
+
+@sa.event.listens_for(Session, "after_commit")
+def _discard_committed(session: Session) -> None:
+    _discard(session.info.pop("djask_changed_generations", ()))
+
+
+@sa.event.listens_for(Session, "after_rollback")
+def _forget_changes(session: Session) -> None:
+    session.info.pop("djask_changed_generations", None)
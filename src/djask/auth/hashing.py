@@ -0,0 +1,110 @@
+"""
+Hash passwords on a bounded pool of threads.
+
+PBKDF2 releases the GIL, so hashing on a pool runs in parallel with the
+request threads while capping the number of cores spent on it: a burst of
+logins queues on the pool instead of taking every core of the worker.
+"""
+from __future__ import annotations
+
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import has_app_context
+from werkzeug.security import check_password_hash
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+from werkzeug.security import generate_password_hash
+
+from ..globals import current_app
+
+T = t.TypeVar("T")
+
+DEFAULT_METHOD = f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+
+
+def _normalize(method: str) -> str:
+    # werkzeug stores the default iterations in the hash
+    if method.startswith("pbkdf2:") and method.count(":") == 1:
+        return f"{method}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+    """
+    Hash and check passwords with a configured method on a thread pool.
+
+    .. versionadded:: 0.7.0
+
+    :param method: The werkzeug hash method, e.g. ``pbkdf2:sha256:260000``
+    :param workers: The number of threads hashing passwords, ``0`` to hash
+        them on the calling thread
+    """
+
+    def __init__(self, method: str = DEFAULT_METHOD, workers: int = 0) -> None:
+        self.method = _normalize(method)
+        self.workers = workers
+        self._executor = (
+            ThreadPoolExecutor(workers, thread_name_prefix="djask-hash")
+            if workers
+            else None
+        )
+
+    def _run(self, f: t.Callable[..., T], *args: t.Any) -> T:
+        if self._executor is None:
+            return f(*args)
+        return self._executor.submit(f, *args).result()
+
+    def hash(self, password: str) -> str:
+        """Hash a password."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords: t.Iterable[str]) -> list[str]:
+        """Hash passwords, in parallel on the pool."""
+        if self._executor is None:
+            return [generate_password_hash(p, self.method) for p in passwords]
+        futures = [
+            self._executor.submit(generate_password_hash, p, self.method)
+            for p in passwords
+        ]
+        return [future.result() for future in futures]
+
+    def check(self, pwhash: str, password: str) -> bool:
+        """Check a password against a hash."""
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Tell if a hash was made with another method or cost."""
+        return pwhash.split("$", 1)[0] != self.method
+
+    def shutdown(self) -> None:
+        """Stop the threads of the pool once the queued hashes are done."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+_default_hasher = PasswordHasher()
+
+
+def get_hasher() -> PasswordHasher:
+    """Get the hasher configured by ``DJASK_PASSWORD_HASH_METHOD`` and
+    ``DJASK_PASSWORD_HASH_WORKERS`` for the current app.
+
+    .. versionadded:: 0.7.0
+    """
+    if not has_app_context():
+        return _default_hasher
+    config = current_app.config
+    method = config.get("DJASK_PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+    workers = config.get("DJASK_PASSWORD_HASH_WORKERS", 0)
+    hasher = current_app.extensions.get("djask_password_hasher")
+    # the config may change after the first hash, e.g. in tests
+    if hasher is None or (hasher.method, hasher.workers) != (
+        _normalize(method),
+        workers,
+    ):
+        if hasher is not None:
+            hasher.shutdown()
+        hasher = current_app.extensions["djask_password_hasher"] = PasswordHasher(
+            method, workers
+        )
+    return hasher
@@ -0,0 +1,148 @@
+"""
+Cache authenticated users between requests.
+
+The users are cached as snapshots of their column values, which are turned
+back into instances of the current session without a query.  The snapshots
+of a user are dropped as soon as the user is updated or deleted, and again
+when the change is committed.
+"""
+from __future__ import annotations
+
+import typing as t
+from weakref import WeakSet
+
+import sqlalchemy as sa
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..extensions import db
+from ..ttl import TTLCache
+from .abstract import AbstractUser
+
+# (model, primary key, column values)
+Snapshot = t.Tuple[t.Type[AbstractUser], t.Any, t.Dict[str, t.Any]]
+# (snapshot, data cached along, e.g. token claims)
+Entry = t.Tuple[Snapshot, t.Any]
+
+_caches: WeakSet[UserCache] = WeakSet()
+
+
+def snapshot(user: AbstractUser) -> Snapshot:
+    """Take a snapshot of the column values of a user."""
+    state = sa.inspect(user)
+    values = {
+        key: state.dict[key]
+        for key in type(user).get_meta().columns  # type: ignore
+        if key in state.dict
+    }
+    return type(user), state.identity, values
+
+
+def restore(snap: Snapshot) -> AbstractUser:
+    """Get the user of a snapshot in the current session without a query."""
+    model, identity, values = snap
+    user = sa.inspect(model).class_manager.new_instance()
+    for key, value in values.items():
+        set_committed_value(user, key, value)
+    make_transient_to_detached(user)
+    # returns the instance of the identity map if the user is already loaded
+    return db.session.merge(user, load=False)
+
+
+class UserCache:
+    """
+    A TTL cache of user snapshots, invalidated when the users change.
+
+    .. versionadded:: 0.7.0
+
+    :param maxsize: The maximum number of cached users
+    :param ttl: The lifetime of an entry in seconds
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache: TTLCache[t.Hashable, Entry] = TTLCache(maxsize, ttl)
+        _caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: t.Hashable) -> tuple[AbstractUser, t.Any] | None:
+        """Get the cached user of a key, as an instance of the current session,
+        and the data cached along with it."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        return restore(entry[0]), entry[1]
+
+    def set(
+        self,
+        key: t.Hashable,
+        user: AbstractUser,
+        data: t.Any = None,
+        ttl: float | None = None,
+    ) -> None:
+        """Cache a user under a key.
+
+        :param data: Data to cache along with the user
+        :param ttl: The lifetime of the entry if shorter than the default one
+        """
+        if ttl is not None:
+            ttl = min(ttl, self._cache.ttl)
+        self._cache.set(key, (snapshot(user), data), ttl)
+
+    def discard_user(self, model: type, identity: t.Any) -> None:
+        """Drop the entries of a user."""
+        self._cache.discard_if(
+            lambda _, entry: entry[0][1] == identity and entry[0][0] is model
+        )
+
+    def discard_model(self, model: type) -> None:
+        """Drop the entries of all the users of a model."""
+        self._cache.discard_if(lambda _, entry: issubclass(entry[0][0], model))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def _discard(changes: t.Iterable[tuple[type, t.Any]]) -> None:
+    # (model, identity), or (model, None) for all the users of a model
+    for cache in list(_caches):
+        for model, identity in changes:
+            if identity is None:
+                cache.discard_model(model)
+            else:
+                cache.discard_user(model, identity)
+
+
+def _record(session: Session | None, model: type, identity: t.Any) -> None:
+    # the entries are dropped at once, and again on commit, as a request may
+    # cache the former row until then
+    _discard([(model, identity)])
+    if session is not None:
+        session.info.setdefault("djask_changed_users", set()).add((model, identity))
+
+
+@sa.event.listens_for(AbstractUser, "after_update", propagate=True)
+@sa.event.listens_for(AbstractUser, "after_delete", propagate=True)
+def _discard_user(mapper, connection, target) -> None:
+    _record(object_session(target), mapper.class_, sa.inspect(target).identity)
+
+
+@sa.event.listens_for(Session, "after_bulk_update")
+@sa.event.listens_for(Session, "after_bulk_delete")
+def _discard_users(context) -> None:
+    model = context.mapper.class_
+    if issubclass(model, AbstractUser):
+        _record(context.session, model, None)
+
+
+@sa.event.listens_for(Session, "after_commit")
+def _discard_committed(session: Session) -> None:
+    _discard(session.info.pop("djask_changed_users", ()))
+
+
+@sa.event.listens_for(Session, "after_rollback")
+def _forget_changes(session: Session) -> None:
+    session.info.pop("djask_changed_users", None)
@@ -1,4 +1,13 @@
+from __future__ import annotations
+
+import datetime as dt
+import secrets
+from hashlib import sha256
+
+import sqlalchemy as sa
+
 from ..db import Model
+from ..extensions import db
 from .abstract import AbstractUser
 from .permission import Permission as Permission  # noqa
 
@@ -11,3 +20,107 @@ class User(AbstractUser, Model):
     """
 
     pass
+
+
+class TokenGeneration(Model):
+    """
+    The token generation of a user, see :mod:`djask.auth.claims`.
+
+    It is kept out of the user table so existing databases only need the new
+    table.  A user without a row is at generation 0.
+
+    .. versionadded:: 0.7.0
+    """
+
+    user_id = sa.Column(sa.Integer, unique=True, nullable=False)
+    generation = sa.Column(sa.Integer, default=0, nullable=False)
+
+
+def _digest(token: str) -> str:
+    return sha256(token.encode()).hexdigest()
+
+
+class RefreshToken(Model):
+    """
+    A refresh token of the web API.
+
+    Only the SHA-256 digest of a token is stored, and looked up through a
+    unique index.  A token is single-use: refreshing rotates it, and using it
+    again revokes all the tokens descending from the same login, as it must
+    have been stolen.
+
+    .. versionadded:: 0.7.0
+    """
+
+    digest = sa.Column(sa.String(64), unique=True, nullable=False)
+    # the tokens rotated from the same login share a family
+    family = sa.Column(sa.String(32), index=True, nullable=False)
+    user_id = sa.Column(sa.Integer, index=True, nullable=False)
+    expires_at = sa.Column(sa.DateTime, index=True, nullable=False)
+    used = sa.Column(sa.Boolean, default=False, nullable=False)
+
+    @classmethod
+    def issue(cls, user_id: int, expiration: int, family: str | None = None) -> str:
+        """Issue a refresh token for a user.  The caller commits.
+
+        :param user_id: The id of the user
+        :param expiration: The lifetime of the token in seconds
+        :param family: The family of the rotated token, ``None`` for a new login
+        :return: The token
+        """
+        token = secrets.token_urlsafe(32)
+        row = cls()
+        row.digest = _digest(token)
+        row.family = family or secrets.token_hex(16)
+        row.user_id = user_id
+        row.expires_at = dt.datetime.utcnow() + dt.timedelta(seconds=expiration)
+        db.session.add(row)
+        return token
+
+    @classmethod
+    def rotate(cls, token: str, expiration: int) -> tuple[int, str] | None:
+        """Consume a refresh token and issue the next one.  The caller commits.
+
+        :param token: The refresh token
+        :param expiration: The lifetime of the new token in seconds
+        :return: The user id and the new token, or ``None`` if the token is
+            invalid, expired or already used
+        """
+        row = db.session.query(cls).filter_by(digest=_digest(token)).first()
+        if row is None or row.expires_at < dt.datetime.utcnow():
+            return None
+        # mark the token as used atomically, so it can't be used twice
+        # by concurrent requests
+        consumed = (
+            db.session.query(cls)
+            .filter_by(id=row.id, used=False)
+            .update({"used": True}, synchronize_session=False)
+        )
+        if not consumed:
+            cls.revoke_family(row.family)
+            return None
+        return row.user_id, cls.issue(row.user_id, expiration, row.family)
+
+    @classmethod
+    def revoke_family(cls, family: str) -> None:
+        """Revoke all the tokens of a family.  The caller commits."""
+        db.session.query(cls).filter_by(family=family).delete(synchronize_session=False)
+
+    @classmethod
+    def revoke_user(cls, user_id: int) -> None:
+        """Revoke all the refresh tokens of a user.  The caller commits."""
+        db.session.query(cls).filter_by(user_id=user_id).delete(
+            synchronize_session=False
+        )
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        """Delete the expired tokens.  The caller commits.
+
+        :return: The number of deleted tokens
+        """
+        return (
+            db.session.query(cls)
+            .filter(cls.expires_at < dt.datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
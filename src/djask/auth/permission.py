@@ -1,9 +1,38 @@
+from typing import Dict
+from typing import FrozenSet
+from typing import Optional
+from typing import Tuple
 from typing import Union
 
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapper
+
 from ..exceptions import ModelNotFoundError
 from ..extensions import db
 from ..types import ModelType
 
+# the table names of the mapped models, built on demand
+_tables: Optional[FrozenSet[str]] = None
+# (table name, permission name) -> permission
+_interned: Dict[Tuple[str, str], "Permission"] = {}
+
+
+@sa.event.listens_for(Mapper, "after_configured")
+def _clear_index() -> None:
+    global _tables
+    _tables = None
+    _interned.clear()
+
+
+def _table_exists(tablename: str) -> bool:
+    global _tables
+    if _tables is None or tablename not in _tables:
+        # models may have been mapped since the index was built
+        _tables = frozenset(
+            mapper.class_.__tablename__ for mapper in db.Model.registry.mappers
+        )
+    return tablename in _tables
+
 
 class Permission(str):
     """
@@ -11,30 +40,30 @@ class Permission(str):
 
     .. versionadded:: 0.7.0
 
-    :param model: The
+    Permissions are interned, so building one that was built before is a
+    dict lookup.
+
+    :param model: The model or its table name
     :type model: Union[str, ModelType]
-    :param permission_name: _description_
+    :param permission_name: The name of the permission, e.g. ``read``
     :type permission_name: str
-    :raises ModelNotFoundError: _description_
-    :raises TableNameAsciiExpectedError: _description_
-    :return: _description_
+    :raises ModelNotFoundError: if no model has the table name
+    :return: The permission, ``<table name>_<permission name>``
     :rtype: str | NoReturn
     """
 
     def __new__(
         cls, model: Union[str, ModelType], permission_name: str
     ) -> "Permission":
-        if isinstance(model, str):
-            model_found = model in (
-                mapper.class_.__tablename__ for mapper in db.Model.registry.mappers
-            )
-
-            if not model_found:
+        tablename = model if isinstance(model, str) else model.__tablename__
+        key = (tablename, permission_name)
+        perm = _interned.get(key)
+        if perm is None:
+            if isinstance(model, str) and not _table_exists(model):
                 raise ModelNotFoundError(model)
-
-            return super().__new__(cls, f"{model}_{permission_name}")
-
-        return super().__new__(cls, model.__tablename__ + f"_{permission_name}")
+            perm = super().__new__(cls, f"{tablename}_{permission_name}")
+            perm = _interned.setdefault(key, perm)
+        return perm
 
 
 class PermissionExistingWarning(Warning):
@@ -2,9 +2,10 @@ from apiflask import APIBlueprint as APIBp
 from flask import Blueprint as Bp
 
 from .mixins import ModelFunctionalityMixin
+from .mixins import ViewCacheMixin
 
 
-class Blueprint(Bp, ModelFunctionalityMixin):
+class Blueprint(Bp, ModelFunctionalityMixin, ViewCacheMixin):
     """
     Flask's :class:`~flask.Blueprint` object with some SQL support.
     """
@@ -12,7 +13,7 @@ class Blueprint(Bp, ModelFunctionalityMixin):
     pass
 
 
-class APIBlueprint(APIBp, ModelFunctionalityMixin):  # pragma: no cover
+class APIBlueprint(APIBp, ModelFunctionalityMixin, ViewCacheMixin):  # pragma: no cover
     """
     APIFlask's ``APIBlueprint`` object with some SQL support.
     """
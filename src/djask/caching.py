@@ -0,0 +1,448 @@
+"""
+Cache the responses of views, invalidated when the models they read change.
+
+A cached response is stored under a key made of the endpoint, the path, the
+query string, the chosen request headers and the generation of every model
+the view depends on.  Committing a change to one of these models bumps its
+generation, so the entries built from the former state are never read again
+and expire on their own.
+
+The generations are stored in the backend, so a filesystem or SQLite backend
+shared by the workers invalidates the entries of all of them, while the
+memory backend only sees the commits of its own process.
+"""
+from __future__ import annotations
+
+import abc
+import os
+import os.path as path
+import pickle
+import sqlite3
+import threading
+import typing as t
+import uuid
+from functools import wraps
+from hashlib import sha256
+from itertools import count
+from time import time
+from weakref import WeakSet
+
+import sqlalchemy as sa
+from flask import Flask
+from flask import Response
+from sqlalchemy.orm import Session
+
+from .db.models import Model
+from .exceptions import ModelTypeError
+from .globals import current_app
+from .globals import request
+from .ttl import TTLCache
+from .types import ModelType
+
+# (status, headers, body)
+Entry = t.Tuple[int, t.List[t.Tuple[str, str]], bytes]
+
+_view_caches: WeakSet[ViewCache] = WeakSet()
+
+
+class CacheBackend(abc.ABC):
+    """
+    The storage of a :class:`ViewCache`.
+
+    .. versionadded:: 0.7.0
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Entry | None:
+        """Get an entry, ``None`` if it is missing or expired."""
+
+    @abc.abstractmethod
+    def set(self, key: str, entry: Entry, timeout: float) -> None:
+        """Store an entry for ``timeout`` seconds."""
+
+    @abc.abstractmethod
+    def get_generations(self, names: t.Sequence[str]) -> list[t.Any]:
+        """Get the current generation of each name."""
+
+    @abc.abstractmethod
+    def bump(self, names: t.Iterable[str]) -> None:
+        """Start a new generation for each name."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Drop the entries and the generations."""
+
+
+class MemoryBackend(CacheBackend):
+    """
+    An LRU cache in the memory of the process.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self, maxsize: int, timeout: float) -> None:
+        self._entries: TTLCache[str, Entry] = TTLCache(maxsize, timeout)
+        self._generations: dict[str, int] = {}
+        self._counter = count(1)
+
+    def get(self, key: str) -> Entry | None:
+        return self._entries.get(key)
+
+    def set(self, key: str, entry: Entry, timeout: float) -> None:
+        self._entries.set(key, entry, timeout)
+
+    def get_generations(self, names: t.Sequence[str]) -> list[t.Any]:
+        return [self._generations.get(name, 0) for name in names]
+
+    def bump(self, names: t.Iterable[str]) -> None:
+        for name in names:
+            # the counter is atomic, unlike reading and incrementing a value
+            self._generations[name] = next(self._counter)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+
+
+class FileSystemBackend(CacheBackend):
+    """
+    A cache in a folder, one file per entry, shared by the processes.
+
+    .. versionadded:: 0.7.0
+
+    :param directory: The folder of the entries, created if missing
+    :param maxsize: The number of entries above which the oldest are pruned
+    """
+
+    #: the number of writes between two prunes
+    prune_interval = 100
+
+    def __init__(self, directory: str, maxsize: int) -> None:
+        self.directory = directory
+        self.maxsize = maxsize
+        self._writes = count()
+        os.makedirs(path.join(directory, "generations"), exist_ok=True)
+
+    def _write(self, filename: str, data: bytes) -> None:
+        # write then rename, so the readers never see a partial file
+        tmp = f"{filename}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filename)
+
+    def get(self, key: str) -> Entry | None:
+        try:
+            with open(path.join(self.directory, key), "rb") as f:
+                expires, entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return entry if expires > time() else None
+
+    def set(self, key: str, entry: Entry, timeout: float) -> None:
+        self._write(
+            path.join(self.directory, key), pickle.dumps((time() + timeout, entry))
+        )
+        if next(self._writes) % self.prune_interval == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:  # pragma: no cover
+                    pass
+        entries.sort()
+        for _, filename in entries[: max(0, len(entries) - self.maxsize)]:
+            try:
+                os.remove(filename)
+            except OSError:  # pragma: no cover
+                pass
+
+    def get_generations(self, names: t.Sequence[str]) -> list[t.Any]:
+        generations = []
+        for name in names:
+            try:
+                with open(path.join(self.directory, "generations", name)) as f:
+                    generations.append(f.read())
+            except OSError:
+                generations.append("")
+        return generations
+
+    def bump(self, names: t.Iterable[str]) -> None:
+        for name in names:
+            # a unique value needs no lock between the processes
+            filename = path.join(self.directory, "generations", name)
+            self._write(filename, uuid.uuid4().hex.encode())
+
+    def clear(self) -> None:
+        for directory in (self.directory, path.join(self.directory, "generations")):
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    os.remove(entry.path)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    A cache in an SQLite database, shared by the processes.
+
+    .. versionadded:: 0.7.0
+
+    :param filename: The database file, created if missing
+    :param maxsize: The number of entries above which the oldest are pruned
+    """
+
+    #: the number of writes between two prunes
+    prune_interval = 100
+
+    def __init__(self, filename: str, maxsize: int) -> None:
+        self.filename = filename
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._writes = count()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries"
+                " (key TEXT PRIMARY KEY, expires REAL, value BLOB)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations"
+                " (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared by threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.filename, timeout=10)
+        return conn
+
+    def get(self, key: str) -> Entry | None:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value FROM entries WHERE key = ? AND expires > ?",
+                (key, time()),
+            )
+            .fetchone()
+        )
+        return None if row is None else pickle.loads(row[0])
+
+    def set(self, key: str, entry: Entry, timeout: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, time() + timeout, pickle.dumps(entry)),
+            )
+            if next(self._writes) % self.prune_interval == 0:
+                conn.execute("DELETE FROM entries WHERE expires <= ?", (time(),))
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries"
+                    " ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,),
+                )
+
+    def get_generations(self, names: t.Sequence[str]) -> list[t.Any]:
+        rows = dict(
+            self._connect()
+            .execute(
+                "SELECT name, value FROM generations WHERE name IN"
+                f" ({', '.join('?' * len(names))})",
+                tuple(names),
+            )
+            .fetchall()
+        )
+        return [rows.get(name, 0) for name in names]
+
+    def bump(self, names: t.Iterable[str]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO generations VALUES (?, 1) ON CONFLICT(name)"
+                " DO UPDATE SET value = value + 1",
+                [(name,) for name in names],
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM generations")
+
+
+class ViewCache:
+    """
+    The view cache of an app, see :meth:`~djask.mixins.ViewCacheMixin.cache`.
+
+    .. versionadded:: 0.7.0
+
+    :param backend: The storage of the entries and the generations
+    :param timeout: The default lifetime of an entry in seconds
+    """
+
+    def __init__(self, backend: CacheBackend, timeout: float) -> None:
+        self.backend = backend
+        self.timeout = timeout
+        _view_caches.add(self)
+
+    def make_key(self, tables: t.Sequence[str], headers: t.Sequence[str]) -> str:
+        """Make the key of the current request."""
+        parts = [
+            request.endpoint or "",
+            request.path,
+            sorted(request.args.items(multi=True)),
+            [request.headers.get(header, "") for header in headers],
+        ]
+        if tables:
+            parts.append(self.backend.get_generations(tables))
+        return sha256(repr(parts).encode()).hexdigest()
+
+    def bump(self, tables: t.Iterable[str]) -> None:
+        """Invalidate the entries depending on tables."""
+        tables = sorted(tables)
+        if tables:
+            self.backend.bump(tables)
+
+
+def _make_backend(app: Flask) -> CacheBackend:
+    config = app.config
+    backend = config["DJASK_CACHE_BACKEND"]
+    if isinstance(backend, CacheBackend):
+        return backend
+    location = config["DJASK_CACHE_LOCATION"]
+    if backend == "memory":
+        return MemoryBackend(config["DJASK_CACHE_SIZE"], config["DJASK_CACHE_TIMEOUT"])
+    if backend == "filesystem":
+        location = location or path.join(app.instance_path, "djask-cache")
+        return FileSystemBackend(location, config["DJASK_CACHE_SIZE"])
+    if backend == "sqlite":
+        location = location or path.join(app.instance_path, "djask-cache.sqlite3")
+        os.makedirs(path.dirname(path.abspath(location)), exist_ok=True)
+        return SQLiteBackend(location, config["DJASK_CACHE_SIZE"])
+    raise ValueError(f"Unknown cache backend: {backend!r}")
+
+
+def get_view_cache(app: Flask | None = None) -> ViewCache:
+    """Get the view cache of an app, the current one by default.
+
+    .. versionadded:: 0.7.0
+    """
+    app = app or current_app._get_current_object()  # type: ignore
+    cache = app.extensions.get("djask_view_cache")
+    if cache is None:
+        cache = app.extensions.setdefault(
+            "djask_view_cache",
+            ViewCache(_make_backend(app), app.config["DJASK_CACHE_TIMEOUT"]),
+        )
+    return cache
+
+
+def _is_cacheable(response: Response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.is_streamed
+        and "Set-Cookie" not in response.headers
+        and not response.cache_control.no_store
+        and not response.cache_control.private
+    )
+
+
+def cached(
+    timeout: float | None = None,
+    models: t.Iterable[ModelType] = (),
+    headers: t.Iterable[str] = (),
+) -> t.Callable[[t.Callable], t.Callable]:
+    """A decorator caching the responses of a view to ``GET`` requests.
+
+    .. versionadded:: 0.7.0
+
+    :param timeout: The lifetime of the entries, ``DJASK_CACHE_TIMEOUT`` by
+        default
+    :param models: The models the view reads, whose changes invalidate it
+    :param headers: The request headers the response depends on, e.g.
+        ``Accept-Language``, or ``Cookie`` for the views showing the user
+    """
+    tables: list[str] = []
+    for model in models:
+        if not isinstance(model, type(Model)):
+            raise ModelTypeError
+        tables.extend(table.name for table in sa.inspect(model).tables)
+    tables = sorted(set(tables))
+    header_names = tuple(headers)
+
+    def decorator(f: t.Callable) -> t.Callable:
+        @wraps(f)
+        def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            if request.method not in ("GET", "HEAD"):
+                return current_app.ensure_sync(f)(*args, **kwargs)
+            cache = get_view_cache()
+            key = cache.make_key(tables, header_names)
+            entry = cache.backend.get(key)
+            if entry is not None:
+                status, response_headers, body = entry
+                return current_app.response_class(body, status, response_headers)
+            response = current_app.make_response(
+                current_app.ensure_sync(f)(*args, **kwargs)
+            )
+            if _is_cacheable(response):
+                entry = (
+                    response.status_code,
+                    list(response.headers.items()),
+                    response.get_data(),
+                )
+                cache.backend.set(key, entry, timeout or cache.timeout)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def record_changes(session: t.Any, model: ModelType) -> None:
+    """Invalidate the views reading a model once the session commits.
+
+    The changes made through the ORM are recorded on their own, call it for
+    the writes the session events don't see, like ``bulk_insert_mappings``.
+
+    .. versionadded:: 0.7.0
+
+    :param session: The session of the changes
+    :param model: The changed model
+    """
+    changed = session.info.setdefault("djask_changed_tables", set())
+    changed.update(table.name for table in sa.inspect(model).tables)
+
+
+def _tables_of(instances: t.Iterable[t.Any]) -> set[str]:
+    return {
+        table.name
+        for instance in instances
+        for table in sa.inspect(instance).mapper.tables
+    }
+
+
+@sa.event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context: t.Any) -> None:
+    changed = session.info.setdefault("djask_changed_tables", set())
+    changed.update(_tables_of(session.new))
+    changed.update(_tables_of(session.dirty))
+    changed.update(_tables_of(session.deleted))
+
+
+@sa.event.listens_for(Session, "after_bulk_update")
+@sa.event.listens_for(Session, "after_bulk_delete")
+def _collect_bulk_changes(context: t.Any) -> None:
+    record_changes(context.session, context.mapper)
+
+
+@sa.event.listens_for(Session, "after_commit")
+def _invalidate(session: Session) -> None:
+    changed = session.info.pop("djask_changed_tables", None)
+    if changed:
+        for cache in list(_view_caches):
+            cache.bump(changed)
+
+
+@sa.event.listens_for(Session, "after_rollback")
+def _forget_changes(session: Session) -> None:
+    session.info.pop("djask_changed_tables", None)
@@ -27,6 +27,8 @@ from flask.helpers import get_load_dotenv
 from werkzeug import run_simple
 from werkzeug.serving import is_running_from_reloader
 
+from .assets import build_assets
+from .assets import write_assets
 from .custom_commands import create_app_command
 from .custom_commands import create_bp_command
 from .globals import current_app
@@ -452,6 +454,8 @@ class DjaskGroup(FlaskGroup):
             self.add_command(run_command)
             self.add_command(shell_command)
             self.add_command(routes_command)
+            self.add_command(spec_command)
+            self.add_command(assets_command)
             self.add_command(create_bp_command)
             self.add_command(create_app_command)
 
@@ -482,6 +486,13 @@ class DjaskGroup(FlaskGroup):
 
         return super().make_context(info_name, args, parent=parent, **extra)
 
+    def _load_plugin_commands(self) -> None:
+        # the plugin commands, e.g. ``spec`` from APIFlask, must not
+        # replace the built-in ones
+        builtin = dict(self.commands)
+        super()._load_plugin_commands()
+        self.commands.update(builtin)
+
     def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
         if not args and self.no_args_is_help:
             # Attempt to load --env-file and --app early in case they
@@ -790,6 +801,63 @@ def routes_command(sort: str, all_methods: bool) -> None:
         click.echo(row.format(rule.endpoint, methods, rule.rule).rstrip())
 
 
+@click.command("spec", short_help="Write the OpenAPI spec.")
+@click.option(
+    "--format",
+    "-f",
+    "spec_format",
+    type=click.Choice(("json", "yaml", "yml")),
+    help="The format of the spec, guessed from the output file or SPEC_FORMAT.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    help="The file to write the spec to, instead of the standard output.",
+)
+@with_appcontext
+def spec_command(spec_format: str | None, output: str | None) -> None:
+    """Generate the OpenAPI spec of the app.
+
+    Write it at build time and set DJASK_SPEC_FILE to its path so the
+    workers load it instead of generating it.
+    """
+    if spec_format is None and output is not None:
+        ext = os.path.splitext(output)[1].lower()
+        spec_format = {".json": "json", ".yaml": "yaml", ".yml": "yaml"}.get(ext)
+    # generate the spec even if DJASK_SPEC_FILE is set
+    current_app._get_spec(spec_format, force_update=True)  # type: ignore
+    data = current_app.get_spec_bytes(spec_format)  # type: ignore
+    if output is None:
+        click.echo(data.decode())
+        return
+    with open(output, "wb") as f:
+        f.write(data)
+    click.echo(f"Spec written to {output}.")
+
+
+@click.command("assets", short_help="Build the static assets.")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(file_okay=False, writable=True),
+    help="The folder to write the assets to, DJASK_ASSETS_DIR by default.",
+)
+@with_appcontext
+def assets_command(output: str | None) -> None:
+    """Fingerprint and compress the built-in static files.
+
+    Write them at build time and set DJASK_ASSETS_DIR to the folder so the
+    workers load them instead of compressing them.
+    """
+    output = output or current_app.config["DJASK_ASSETS_DIR"]
+    if output is None:
+        raise click.UsageError("Pass --output or set DJASK_ASSETS_DIR.")
+    assets = build_assets()
+    write_assets(assets, output)
+    click.echo(f"{len(assets)} assets written to {output}.")
+
+
 cli = DjaskGroup(
     name="djask",
     help="""\
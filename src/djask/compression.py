@@ -0,0 +1,339 @@
+"""
+Compress the responses with levels adapted to their size and the load.
+
+A fixed high level spends more CPU on large bodies than the bandwidth it
+saves, so :class:`AdaptiveCompress` lowers the level as the bodies grow and
+when the worker is busy, skips the bodies that don't compress, compresses
+streamed responses chunk by chunk and keeps the compressed bodies of the
+cacheable responses.
+"""
+from __future__ import annotations
+
+import threading
+import typing as t
+import zlib
+from hashlib import sha1
+from time import thread_time
+
+import brotli
+from flask import Flask
+from flask import Response
+from flask_compress import Compress
+
+from .globals import current_app
+from .globals import request
+from .ttl import TTLCache
+
+# the magic numbers of gzip, zip, png, jpeg, woff2 and zstd bodies
+_COMPRESSED_MAGIC = (
+    b"\x1f\x8b",
+    b"PK\x03\x04",
+    b"\x89PNG",
+    b"\xff\xd8\xff",
+    b"wOF2",
+    b"\x28\xb5\x2f\xfd",
+)
+# the largest body whose compressed form is cached
+_MAX_CACHED_SIZE = 1024 * 1024
+# the content codings, suffixed to the ETags of the compressed responses
+CODINGS = ("br", "gzip", "deflate")
+
+
+def strip_coding(etag: str) -> str:
+    """Remove the content coding suffix :class:`AdaptiveCompress` adds to the
+    ETags of the responses it compresses.
+
+    .. versionadded:: 0.7.0
+    """
+    base, _, coding = etag.rpartition(":")
+    return base if base and coding in CODINGS else etag
+
+
+class CompressionStats:
+    """
+    Counters of the work done by :class:`AdaptiveCompress` in a process.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.skipped = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, cpu_time: float) -> None:
+        with self._lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_time += cpu_time
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    def as_dict(self) -> dict[str, t.Any]:
+        """The counters, with the bytes saved per CPU second spent."""
+        with self._lock:
+            saved = self.bytes_in - self.bytes_out
+            return {
+                "responses": self.responses,
+                "skipped": self.skipped,
+                "cache_hits": self.cache_hits,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": saved,
+                "cpu_time": self.cpu_time,
+                "bytes_saved_per_cpu_second": (
+                    saved / self.cpu_time if self.cpu_time else None
+                ),
+            }
+
+
+class _State:
+    # the compression state of an app
+    def __init__(self, cache_size: int, cache_ttl: float) -> None:
+        self.stats = CompressionStats()
+        self.cache: TTLCache[tuple, bytes] | None = (
+            TTLCache(cache_size, cache_ttl) if cache_size and cache_ttl else None
+        )
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+
+class _StreamCompressor:
+    def __init__(self, algorithm: str, level: int) -> None:
+        if algorithm == "br":
+            self._brotli = brotli.Compressor(quality=level)
+        else:
+            self._zlib = zlib.compressobj(
+                level, zlib.DEFLATED, 31 if algorithm == "gzip" else zlib.MAX_WBITS
+            )
+        self.algorithm = algorithm
+
+    def compress(self, data: bytes) -> bytes:
+        # flush every chunk so the client gets it without waiting for more
+        if self.algorithm == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.algorithm == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_body(data: bytes, algorithm: str, level: int) -> bytes:
+    """Compress a body with ``br``, ``gzip`` or ``deflate``.
+
+    .. versionadded:: 0.7.0
+    """
+    if algorithm == "br":
+        return brotli.compress(data, quality=level)
+    wbits = 31 if algorithm == "gzip" else zlib.MAX_WBITS
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(
+    chunks: t.Iterable[bytes],
+    algorithm: str,
+    level: int,
+    stats: CompressionStats | None = None,
+) -> t.Iterator[bytes]:
+    """Compress a stream chunk by chunk with ``br``, ``gzip`` or ``deflate``.
+
+    Every chunk is flushed, so the client gets it without waiting for the
+    next one.
+
+    .. versionadded:: 0.7.0
+
+    :param stats: The counters to record the work in
+    """
+    compressor = _StreamCompressor(algorithm, level)
+    if stats is not None:
+        stats.count("responses")
+    for chunk in chunks:
+        if not chunk:
+            continue
+        start = thread_time()
+        data = compressor.compress(chunk)
+        if stats is not None:
+            stats.record(len(chunk), len(data), thread_time() - start)
+        yield data
+    start = thread_time()
+    data = compressor.finish()
+    if stats is not None:
+        stats.record(0, len(data), thread_time() - start)
+    yield data
+
+
+class AdaptiveCompress(Compress):
+    """
+    A Flask-Compress extension choosing the compression of every response.
+
+    The level depends on the size of the body and is lowered when more than
+    ``DJASK_COMPRESS_BUSY_REQUESTS`` requests are being handled by the
+    process.  ``COMPRESS_LEVEL`` and ``COMPRESS_BR_LEVEL`` cap the levels.
+    Bodies smaller than ``COMPRESS_MIN_SIZE``, of a type not listed in
+    ``COMPRESS_MIMETYPES`` or already compressed are left as they are.
+
+    .. versionadded:: 0.7.0
+    """
+
+    #: (largest body size, brotli quality, gzip and deflate level), the first
+    #: tier a body fits in is used, streamed bodies use the last one
+    tiers: t.Sequence[tuple[int | None, int, int]] = (
+        (64 * 1024, 5, 6),
+        (1024 * 1024, 4, 5),
+        (None, 2, 3),
+    )
+    #: (brotli quality, gzip and deflate level) when the process is busy
+    busy_levels: tuple[int, int] = (1, 1)
+
+    def init_app(self, app: Flask) -> None:
+        for key, value in (
+            ("DJASK_COMPRESS_BUSY_REQUESTS", 8),
+            ("DJASK_COMPRESS_STREAMS", True),
+            ("DJASK_COMPRESS_CACHE_SIZE", 64),
+            ("DJASK_COMPRESS_CACHE_TTL", 300),
+        ):
+            app.config.setdefault(key, value)
+        super().init_app(app)
+        app.extensions["djask_compress"] = _State(
+            app.config["DJASK_COMPRESS_CACHE_SIZE"],
+            app.config["DJASK_COMPRESS_CACHE_TTL"],
+        )
+        if app.config["COMPRESS_REGISTER"] and app.config["COMPRESS_MIMETYPES"]:
+            app.before_request(self._enter)
+            app.teardown_request(self._leave)
+
+    @staticmethod
+    def get_stats(app: Flask | None = None) -> CompressionStats:
+        """Get the compression counters of an app, the current one by default."""
+        return (app or current_app).extensions["djask_compress"].stats
+
+    @staticmethod
+    def _enter() -> None:
+        state = current_app.extensions["djask_compress"]
+        with state.lock:
+            state.in_flight += 1
+        request.environ["djask.compress.counted"] = True
+
+    @staticmethod
+    def _leave(exc: BaseException | None = None) -> None:
+        # an earlier before_request function may have ended the request
+        if request.environ.pop("djask.compress.counted", False):
+            state = current_app.extensions["djask_compress"]
+            with state.lock:
+                state.in_flight -= 1
+
+    def get_level(self, algorithm: str, size: int | None, busy: bool) -> int:
+        """Choose the level of a body of ``size`` bytes, ``None`` if streamed."""
+        config = current_app.config
+        if busy:
+            br_level, level = self.busy_levels
+        else:
+            for limit, br_level, level in self.tiers:
+                if limit is None or (size is not None and size <= limit):
+                    break
+        if algorithm == "br":
+            return min(br_level, config["COMPRESS_BR_LEVEL"])
+        if algorithm == "gzip":
+            return min(level, config["COMPRESS_LEVEL"])
+        deflate_level = config["COMPRESS_DEFLATE_LEVEL"]
+        return level if deflate_level < 0 else min(level, deflate_level)
+
+    @staticmethod
+    def _cache_key(
+        response: Response, data: bytes, algorithm: str, level: int
+    ) -> tuple | None:
+        if (
+            response.status_code != 200
+            or request.method not in ("GET", "HEAD")
+            or len(data) > _MAX_CACHED_SIZE
+        ):
+            return None
+        cache_control = response.cache_control
+        if cache_control.no_store or cache_control.private:
+            return None
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            return request.full_path, etag, algorithm, level
+        if cache_control.public or cache_control.max_age:
+            return sha1(data).digest(), algorithm, level
+        return None
+
+    def after_request(self, response: Response) -> Response:
+        app = current_app
+        state = app.extensions["djask_compress"]
+        response.vary.add("Accept-Encoding")
+        algorithm = self._choose_compress_algorithm(
+            request.headers.get("Accept-Encoding", "")
+        )
+        if (
+            algorithm is None
+            or response.mimetype not in app.config["COMPRESS_MIMETYPES"]
+            or not 200 <= response.status_code < 300
+            # the ranges are offsets into the uncompressed body
+            or response.status_code == 206
+            or "Content-Range" in response.headers
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        busy = state.in_flight > app.config["DJASK_COMPRESS_BUSY_REQUESTS"]
+        if response.is_streamed:
+            if not app.config["DJASK_COMPRESS_STREAMS"]:
+                return response
+            level = self.get_level(algorithm, None, busy)
+            response.response = compress_stream(
+                response.iter_encoded(), algorithm, level, state.stats
+            )
+            response.headers.pop("Content-Length", None)
+            response.direct_passthrough = False
+        else:
+            if (
+                response.content_length is not None
+                and response.content_length < app.config["COMPRESS_MIN_SIZE"]
+            ):
+                return response
+            data = response.get_data()
+            if len(data) < app.config["COMPRESS_MIN_SIZE"] or data.startswith(
+                _COMPRESSED_MAGIC
+            ):
+                state.stats.count("skipped")
+                return response
+            level = self.get_level(algorithm, len(data), busy)
+            key = None
+            if state.cache is not None:
+                key = self._cache_key(response, data, algorithm, level)
+            body = state.cache.get(key) if key is not None else None
+            if body is not None:
+                state.stats.count("cache_hits")
+            else:
+                start = thread_time()
+                body = compress_body(data, algorithm, level)
+                cpu_time = thread_time() - start
+                if len(body) >= len(data):
+                    # the time was spent for nothing
+                    state.stats.record(len(data), len(data), cpu_time)
+                    state.stats.count("skipped")
+                    return response
+                state.stats.record(len(data), len(body), cpu_time)
+                if key is not None:
+                    state.cache.set(key, body)
+            state.stats.count("responses")
+            response.set_data(body)
+        response.headers["Content-Encoding"] = algorithm
+        etag, weak = response.get_etag()
+        if etag:
+            # the compressed body is another representation, see strip_coding
+            response.set_etag(f"{etag}:{algorithm}", bool(weak))
+        return response
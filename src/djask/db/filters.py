@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import operator
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from marshmallow import ValidationError
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "in": lambda column, values: column.in_(values),
+    "is_null": lambda column, value: column.is_(None) if value else column.isnot(None),
+}
+
+
+def build_filters(model: type, spec: Any) -> List[Any]:
+    """Build the SQL conditions described by a JSON filter.
+
+    The filter maps column names to either a value, compared for equality, or
+    an object of operators, e.g.
+    ``{"owner_id": 5, "created_at": {"lt": "2022-01-01T00:00:00"}}``.
+    The operators are ``eq``, ``ne``, ``lt``, ``le``, ``gt``, ``ge``, ``in``
+    (with a list of values) and ``is_null`` (with a boolean).  The values are
+    deserialized by the row schema of the model.
+
+    .. versionadded:: 0.7.0
+
+    :param model: The model to filter
+    :param spec: The filter
+    :raises ValueError: if the filter is invalid
+    """
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("Expecting a non-empty filter object.")
+    fields = model.get_schema(load_instance=False).fields  # type: ignore
+    conditions = []
+    for key, condition in spec.items():
+        if key not in fields:
+            raise ValueError(f"Model {model.__name__} has no column {key}.")
+        if not isinstance(condition, dict):
+            condition = {"eq": condition}
+        for name, value in condition.items():
+            if name not in OPERATORS:
+                raise ValueError(f"Unknown filter operator {name}.")
+            try:
+                if name == "is_null":
+                    value = bool(value)
+                elif name == "in":
+                    if not isinstance(value, list):
+                        raise ValueError(f"Expecting a list of values for {key}.")
+                    value = [fields[key].deserialize(v) for v in value]
+                elif value is not None:
+                    value = fields[key].deserialize(value)
+            except ValidationError as e:
+                raise ValueError(f"Invalid value for {key}: {e.messages}")
+            conditions.append(OPERATORS[name](getattr(model, key), value))
+    return conditions
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Type
+from typing import TYPE_CHECKING
+
+import sqlalchemy as sa
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .models import BaseModel
+
+Check = Callable[[Any], bool]
+
+
+def _compile_check(column: sa.Column) -> Optional[Check]:
+    """Build a check accepting the JSON values that can be stored in ``column``
+    as they are.  ``None`` means every non-null value needs the schema."""
+    type_ = column.type
+    if isinstance(type_, sa.Boolean):
+        return lambda v: type(v) is bool
+    if isinstance(type_, sa.Integer):
+        return lambda v: type(v) is int
+    if isinstance(type_, sa.Float):
+        return lambda v: type(v) is float or type(v) is int
+    if isinstance(type_, sa.String) and not isinstance(type_, sa.Enum):
+        length = type_.length
+        if length is None:
+            return lambda v: type(v) is str
+        return lambda v: type(v) is str and len(v) <= length
+    return None
+
+
+class RowLoader:
+    """
+    Validate dicts of column values for bulk inserts.
+
+    Validating rows with a marshmallow schema costs far more than inserting
+    them, so the rows which only hold values that can be stored as they are,
+    e.g. a ``str`` short enough for a ``String`` column, skip the schema.  The
+    other rows, including the invalid ones, go through
+    :meth:`~djask.db.models.BaseModel.get_schema` so the coercion and the error
+    messages stay the same.
+
+    .. versionadded:: 0.7.0
+
+    :param model: The model of the rows
+    """
+
+    def __init__(self, model: Type[BaseModel]) -> None:
+        self.model = model
+        columns = model.get_meta().columns
+        self.checks: Dict[str, Optional[Check]] = {
+            key: _compile_check(column) for key, column in columns.items()
+        }
+        self.nullable = frozenset(
+            key for key, column in columns.items() if column.nullable
+        )
+        self.required = frozenset(
+            key
+            for key, column in columns.items()
+            if not column.nullable
+            and not column.primary_key
+            and column.default is None
+            and column.server_default is None
+        )
+
+    def _is_plain(self, data: Any) -> bool:
+        if type(data) is not dict or not self.required.issubset(data):
+            return False
+        checks = self.checks
+        for key, value in data.items():
+            if key not in checks:
+                return False
+            if value is None:
+                if key not in self.nullable:
+                    return False
+                continue
+            check = checks[key]
+            if check is None or not check(value):
+                return False
+        return True
+
+    def load(self, data: Any) -> dict[str, Any]:
+        """Validate a row and return its column values.
+
+        :param data: The deserialized JSON object of the row
+        :raises marshmallow.ValidationError: if the row is invalid
+        """
+        if self._is_plain(data):
+            return data
+        return self.model.get_schema(load_instance=False).load(data)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Dict
+from typing import Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import RelationshipProperty
+
+
+class ModelMeta:
+    """
+    The introspected structure of a model.
+
+    Reflecting the mapper is much slower than reading a few dicts, so
+    everything the admin interface, the API and the serializers need to know
+    about a model is gathered once here.  Get it with
+    :meth:`~djask.db.models.BaseModel.get_meta`.
+
+    .. versionadded:: 0.7.0
+
+    :param model: The model class to introspect
+    """
+
+    def __init__(self, model: type) -> None:
+        from ..auth.abstract import AbstractUser
+
+        mapper = inspect(model)
+        table = model.__table__  # type: ignore
+        self.model = model
+        self.name = model.__name__
+        self.tablename: str = table.name
+        #: column attribute key -> column, in mapper order
+        self.columns: Dict[str, sa.Column] = {
+            prop.key: prop.columns[0] for prop in mapper.column_attrs
+        }
+        #: relationship key -> relationship property
+        self.relationships: Dict[str, RelationshipProperty] = dict(
+            mapper.relationships.items()
+        )
+        self.primary_key: Tuple[sa.Column, ...] = tuple(mapper.primary_key)
+        #: the columns which are never serialized
+        self.hidden = frozenset(
+            key
+            for key in self.columns
+            if key.startswith("_")
+            or (key == "password_hash" and issubclass(model, AbstractUser))
+        )
+        #: the keys of the columns which can be scanned with an index
+        self.indexed = frozenset(
+            {c.key for c in table.columns if c.primary_key or c.index or c.unique}
+            | {list(index.columns)[0].key for index in table.indexes}
+        )
+        #: attribute key -> readable type, for the admin interface
+        self.types: Dict[str, str] = {
+            key: repr(column.type) for key, column in self.columns.items()
+        }
+        for key, prop in self.relationships.items():
+            self.types[key] = f"Relationship({prop.mapper.class_.__name__})"
+
+    @property
+    def pk(self) -> sa.Column:
+        """The first column of the primary key."""
+        return self.primary_key[0]
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ModelMeta {self.name}>"
@@ -1,15 +1,45 @@
 from __future__ import annotations
 
 import datetime as dt
+import threading
 from typing import Any
 from typing import Iterable
+from weakref import WeakKeyDictionary
 
 import sqlalchemy as sa
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.inspection import inspect
 from sqlalchemy.orm import as_declarative
-from sqlalchemy.orm.collections import InstrumentedList
+from sqlalchemy.orm import Mapper
+
+from .loader import RowLoader
+from .meta import ModelMeta
+from .pagination import KeysetPage
+from .pagination import paginate_keyset
+from .serializer import ExpandTree
+from .serializer import ModelSerializer
+
+# Per-model caches of everything derived from the mapper (schemas, etc.)
+_class_caches: WeakKeyDictionary[type, dict[str, Any]] = WeakKeyDictionary()
+# Schema instances keep per-load state, so they are cached per thread.
+_local = threading.local()
+_generation = 0
+
+
+def _class_cache(cls: type) -> dict[str, Any]:
+    cache = _class_caches.get(cls)
+    if cache is None:
+        cache = _class_caches[cls] = {}
+    return cache
+
+
+@sa.event.listens_for(Mapper, "after_configured")
+def _clear_class_caches() -> None:
+    """Drop everything derived from the mappers once they are (re)configured,
+    as new mappers may add properties, e.g. backrefs, to existing ones."""
+    global _generation
+    _class_caches.clear()
+    _generation += 1
 
 
 class BaseModel:
@@ -18,52 +48,103 @@ class BaseModel:
     ..versionadded:: 0.4.1
     """
 
-    def to_dict(self, exclude: Iterable[str] = None) -> dict[str, Any]:
+    def to_dict(
+        self, exclude: Iterable[str] = None, expand: ExpandTree = None
+    ) -> dict[str, Any]:
         """Convert Model to dict.
 
         .. versionadded:: 0.4.1
+        .. versionchanged:: 0.7.0
+            Use the serializer compiled for the model, see :meth:`get_serializer`.
+            Add the ``expand`` parameter.
+
+        :param exclude: The names of the attributes to leave out
+        :param expand: A tree of the relationships to include, e.g.
+            ``{"comments": {"author": {}}}``, see
+            :meth:`~djask.db.serializer.ModelSerializer.serialize`.
+        """
+        return type(self).get_serializer().serialize(self, exclude, expand)
+
+    @classmethod
+    def get_meta(cls) -> ModelMeta:
+        """Get the introspected structure of the model, built once per model.
+
+        .. versionadded:: 0.7.0
+        """
+        meta = _class_cache(cls).get("meta")
+        if meta is None:
+            meta = ModelMeta(cls)
+            # building the meta may configure the mappers and reset the caches
+            _class_cache(cls)["meta"] = meta
+        return meta
+
+    @classmethod
+    def get_serializer(cls) -> ModelSerializer:
+        """Get the serializer used by :meth:`to_dict`, compiled once per model.
+
+        .. versionadded:: 0.7.0
         """
-        from ..auth.abstract import AbstractUser
-
-        result = {}
-        for k, v in self.__dict__.items():
-            conditions = (
-                k.startswith("_"),
-                isinstance(self, AbstractUser) and k == "password_hash",
-                exclude is not None and k in exclude,
-            )
-            if any(conditions):
-                continue
-            result[k] = v
-        for k, v in inspect(type(self)).relationships.items():
-            if exclude is None or k not in exclude:
-                attribute = self.__getattribute__(k)
-                if isinstance(attribute, InstrumentedList):  # pragma: no cover
-                    result[k] = [
-                        item.to_dict(exclude=v.back_populates)
-                        for item in attribute
-                        if hasattr(item, "to_dict")
-                    ]
-                else:
-                    if hasattr(attribute, "to_dict"):  # pragma: no cover
-                        result[k] = attribute.to_dict(exclude=(v.back_populates))
-        return result
+        serializer = _class_cache(cls).get("serializer")
+        if serializer is None:
+            serializer = ModelSerializer(cls)
+            _class_cache(cls)["serializer"] = serializer
+        return serializer
 
     @classmethod
-    def to_schema(cls) -> type[SQLAlchemyAutoSchema]:
+    def get_row_loader(cls) -> RowLoader:
+        """Get the loader validating rows for bulk inserts, compiled once per model.
+
+        .. versionadded:: 0.7.0
+        """
+        loader = _class_cache(cls).get("row_loader")
+        if loader is None:
+            loader = RowLoader(cls)
+            _class_cache(cls)["row_loader"] = loader
+        return loader
+
+    @classmethod
+    def to_schema(cls, load_instance: bool = True) -> type[SQLAlchemyAutoSchema]:
         """Convert Model to a marshmallow schema.
 
         .. versionadded:: 0.4.1
+        .. versionchanged:: 0.7.0
+            The schema class is built once per model and cached until
+            the mappers are configured again.  Add ``load_instance``.
+
+        :param load_instance: If ``False``, the schema loads plain dicts of
+            column values, e.g. for bulk inserts, and leaves the relationships out.
         """
+        key = "schema" if load_instance else "row_schema"
+        if key not in _class_cache(cls):
+            instances = load_instance
+
+            class Schema(SQLAlchemyAutoSchema):
+                class Meta:
+                    model = cls
+                    load_instance = instances
+                    include_relationships = instances
+                    include_fk = True
 
-        class Schema(SQLAlchemyAutoSchema):
-            class Meta:
-                model = cls
-                load_instance = True
-                include_relationships = True
-                include_fk = True
+            # building the schema may configure the mappers and reset the caches
+            _class_cache(cls)[key] = Schema
+        return _class_cache(cls)[key]
 
-        return Schema
+    @classmethod
+    def get_schema(cls, load_instance: bool = True) -> SQLAlchemyAutoSchema:
+        """Get a cached instance of the schema returned by :meth:`to_schema`.
+
+        The instance is shared by the calls made from the same thread.
+
+        .. versionadded:: 0.7.0
+        """
+        if getattr(_local, "generation", None) != _generation:
+            _local.generation = _generation
+            _local.schemas = WeakKeyDictionary()
+        schemas = _local.schemas.setdefault(cls, {})
+        schema = schemas.get(load_instance)
+        if schema is None:
+            schema = schemas[load_instance] = cls.to_schema(load_instance)()
+        return schema
 
 
 @as_declarative()
@@ -81,12 +162,51 @@ class Model(BaseModel):
     """The base model class.
 
     .. versionadded:: 0.1.0
+    .. versionchanged:: 0.7.0
+        ``updated_at`` is set on every update.
     """
 
     id = sa.Column(sa.Integer, primary_key=True)
     created_at = sa.Column(sa.DateTime, default=dt.datetime.utcnow)
-    updated_at = sa.Column(sa.DateTime, default=dt.datetime.utcnow)
+    updated_at = sa.Column(
+        sa.DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow
+    )
 
     @declared_attr
     def __tablename__(cls):
         return cls.__name__.lower()
+
+    @classmethod
+    def paginate_keyset(
+        cls,
+        cursor: str | None = None,
+        per_page: int | None = None,
+        order_by: str = "id",
+        query: Any = None,
+    ) -> KeysetPage:
+        """Fetch a page of instances with keyset (cursor) pagination.
+
+        Pass the ``next_cursor`` or ``prev_cursor`` of the returned page to get the
+        next or the previous page.  Every page is fetched with an index seek, so
+        its cost doesn't depend on how deep it is.
+
+        .. versionadded:: 0.7.0
+
+        :param cursor: An opaque cursor of a previous page, ``None`` for the first page
+        :param per_page: The page size, ``DJASK_MODELS_PER_PAGE`` by default
+        :param order_by: The column to sort on, the primary key or an indexed
+            column.  Prefix it with ``-`` to sort in descending order.
+        :param query: The query to paginate, ``cls.query`` by default
+        :raises ValueError: if the cursor is invalid or the column is not indexed
+        """
+        if per_page is None:
+            from flask import current_app
+
+            per_page = current_app.config["DJASK_MODELS_PER_PAGE"]
+        return paginate_keyset(
+            cls,
+            cls.query if query is None else query,  # type: ignore
+            cursor,
+            per_page,  # type: ignore
+            order_by,
+        )
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import base64
+import datetime as dt
+import decimal
+import json
+import operator
+from typing import Any
+from typing import List
+from typing import Optional
+
+import sqlalchemy as sa
+
+
+class InvalidCursorError(ValueError):
+    def __init__(self) -> None:
+        super().__init__("The pagination cursor is invalid.")
+
+
+class KeysetPage:
+    """
+    A page of instances returned by :meth:`~djask.db.models.Model.paginate_keyset`.
+
+    .. versionadded:: 0.7.0
+
+    :param items: The instances on the page
+    :param per_page: The maximum number of instances on a page
+    :param next_cursor: The cursor of the next page, ``None`` on the last page
+    :param prev_cursor: The cursor of the previous page, ``None`` on the first page
+    """
+
+    def __init__(
+        self,
+        items: List[Any],
+        per_page: int,
+        next_cursor: Optional[str],
+        prev_cursor: Optional[str],
+    ) -> None:
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, (dt.date, dt.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def _load_value(column: sa.Column, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:  # pragma: no cover
+        return value
+    if python_type is dt.datetime:
+        return dt.datetime.fromisoformat(value)
+    if python_type is dt.date:
+        return dt.date.fromisoformat(value)
+    if python_type is dt.time:
+        return dt.time.fromisoformat(value)
+    if python_type is decimal.Decimal:
+        return decimal.Decimal(value)
+    return value
+
+
+def encode_cursor(values: List[Any], backwards: bool) -> str:
+    """Encode the sort key of an instance into an opaque cursor."""
+    data = json.dumps([[_dump_value(v) for v in values], backwards])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(columns: List[sa.Column], cursor: str) -> tuple[List[Any], bool]:
+    """Decode a cursor made by :func:`encode_cursor` for the given sort columns."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values, backwards = json.loads(data)
+        if len(values) != len(columns):
+            raise InvalidCursorError
+        return [_load_value(c, v) for c, v in zip(columns, values)], bool(backwards)
+    except (ValueError, TypeError):
+        raise InvalidCursorError
+
+
+def paginate_keyset(
+    model: type,
+    query: Any,
+    cursor: Optional[str],
+    per_page: int,
+    order_by: str,
+) -> KeysetPage:
+    """Fetch a page of ``query`` with keyset pagination.
+
+    The instances are sorted on ``order_by``, then on the primary key to break
+    ties, and a page starts right after (or before) the sort key encoded in
+    the cursor.  Unlike OFFSET, the database seeks to the page through the
+    index, so fetching a deep page costs the same as the first one.
+
+    See :meth:`~djask.db.models.Model.paginate_keyset`.
+    """
+    descending = order_by.startswith("-")
+    key = order_by.lstrip("-")
+    meta = model.get_meta()  # type: ignore
+    if key not in meta.indexed:
+        raise ValueError(f"Cannot sort {model.__name__} on {key}, it is not indexed.")
+    pk = meta.pk
+    columns = [meta.columns[key]] if key == pk.key else [meta.columns[key], pk]
+    attributes = [getattr(model, c.key) for c in columns]
+    # NULLs sort after every value, whatever the database does by default
+    nullable = key != pk.key and columns[0].nullable
+
+    backwards = False
+    if cursor is not None:
+        values, backwards = decode_cursor(columns, cursor)
+        # scanning forwards on an ascending sort, or backwards on a descending
+        # one, goes towards greater keys.
+        greater = descending == backwards
+        compare = operator.gt if greater else operator.lt
+        if len(attributes) == 1:
+            query = query.filter(compare(attributes[0], values[0]))
+        else:
+            column, value = attributes[0], values[0]
+            if value is None:
+                # among the NULLs, only the primary key orders the rows
+                after = sa.and_(column.is_(None), compare(attributes[1], values[1]))
+                if not greater:
+                    after = sa.or_(column.isnot(None), after)
+            else:
+                after = sa.or_(
+                    compare(column, value),
+                    sa.and_(column == value, compare(attributes[1], values[1])),
+                )
+                if nullable:
+                    after = (
+                        sa.or_(column.is_(None), after)
+                        if greater
+                        else sa.and_(column.isnot(None), after)
+                    )
+            query = query.filter(after)
+    scan_descending = descending != backwards
+    order = [a.desc() if scan_descending else a.asc() for a in attributes]
+    if nullable:
+        is_null = attributes[0].is_(None)
+        order.insert(0, is_null.desc() if scan_descending else is_null.asc())
+    query = query.order_by(*order)
+    items = query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    def cursor_of(instance: Any, backwards: bool) -> str:
+        return encode_cursor([getattr(instance, c.key) for c in columns], backwards)
+
+    next_cursor = prev_cursor = None
+    if items:
+        if has_more or backwards:
+            next_cursor = cursor_of(items[-1], False)
+        if (has_more and backwards) or (cursor is not None and not backwards):
+            prev_cursor = cursor_of(items[0], True)
+    return KeysetPage(items, per_page, next_cursor, prev_cursor)
+
+
+def approximate_count(
+    model: type, session: Any, exact_limit: int = 10000
+) -> Optional[int]:
+    """Estimate the number of rows of the table of ``model``.
+
+    PostgreSQL and MySQL estimates are read from the statistics of the table.
+    Elsewhere, or when there are no statistics yet, the rows are counted, but
+    only up to ``exact_limit`` + 1, so the cost doesn't grow with the table.
+
+    :param model: The model to count
+    :param session: The session to query with
+    :param exact_limit: The number of rows to count at most
+    :return: The estimate, or ``None`` if there are more than ``exact_limit``
+        rows and no statistics
+    """
+    table = sa.inspect(model).local_table
+    dialect = session.connection().dialect.name
+    estimate = None
+    if dialect == "postgresql":
+        estimate = session.execute(
+            sa.text("SELECT reltuples FROM pg_class WHERE oid = CAST(:t AS regclass)"),
+            {"t": table.fullname},
+        ).scalar()
+    elif dialect in ("mysql", "mariadb"):
+        estimate = session.execute(
+            sa.text(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = :t"
+            ),
+            {"t": table.name},
+        ).scalar()
+    # reltuples is -1 until the table is first analyzed on PostgreSQL 14+
+    if estimate is not None and estimate > exact_limit:
+        return int(estimate)
+    limited = sa.select(sa.literal(1)).select_from(table).limit(exact_limit + 1)
+    count = session.execute(
+        sa.select(sa.func.count()).select_from(limited.subquery())
+    ).scalar()
+    return None if count > exact_limit else count
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import typing as t
+from weakref import WeakKeyDictionary
+from weakref import WeakSet
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapper
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    from ..types import ModelType
+
+
+_registries: WeakSet[ModelRegistry] = WeakSet()
+
+
+@sa.event.listens_for(Mapper, "after_configured")
+def _clear_caches() -> None:
+    for registry in list(_registries):
+        registry.cache.clear()
+
+
+class ModelRegistry:
+    """
+    An indexed registry of data models.
+
+    Models are indexed by their lowercased class name and by their table name
+    so that looking a model up is a dict access instead of a scan.  Registries of
+    blueprints push the models registered on them to the registries of the apps
+    they are registered on.
+
+    :attr:`cache` holds what is derived from the registered models, such as
+    form classes, and is cleared whenever a model is added or the mappers are
+    configured again.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def __init__(self) -> None:
+        self.models: t.List[ModelType] = []
+        self.version = 0
+        self._by_name: t.Dict[str, ModelType] = {}
+        self._by_table: t.Dict[str, ModelType] = {}
+        self._by_blueprint: t.Dict[str, t.List[ModelType]] = {}
+        self._parents: WeakKeyDictionary[ModelRegistry, str] = WeakKeyDictionary()
+        self.cache: t.Dict[t.Hashable, t.Any] = {}
+        _registries.add(self)
+
+    def __contains__(self, model: object) -> bool:
+        return self._by_name.get(getattr(model, "__name__", "").lower()) is model
+
+    def __iter__(self) -> t.Iterator[ModelType]:
+        return iter(self._by_name.values())
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def add(self, model: ModelType, blueprint: t.Optional[str] = None) -> None:
+        """Index a model.
+
+        :param model: The model to index
+        :param blueprint: The name of the blueprint the model comes from,
+            ``None`` if the model is registered directly.
+        """
+        name = model.__name__.lower()
+        if blueprint is None:
+            if model in self.models:
+                return
+            self.models.append(model)
+        else:
+            bp_models = self._by_blueprint.setdefault(blueprint, [])
+            if model in bp_models:
+                return
+            bp_models.append(model)
+        # the first model registered under a name wins, like the old list scan.
+        self._by_name.setdefault(name, model)
+        self._by_table.setdefault(model.__tablename__, model)
+        self.version += 1
+        self.cache.clear()
+        if blueprint is None:
+            for parent, bp_name in self._parents.items():
+                parent.add(model, bp_name)
+
+    def attach(self, parent: ModelRegistry, blueprint: str) -> None:
+        """Attach a blueprint registry to an app registry.
+
+        The models already registered are copied to the parent and those
+        registered later are pushed to it as well.
+
+        :param parent: The registry of the app
+        :param blueprint: The name of the blueprint
+        """
+        self._parents[parent] = blueprint
+        for model in self.models:
+            parent.add(model, blueprint)
+
+    def get(self, name: str) -> t.Optional[ModelType]:
+        """Get a model by its name, case-insensitively."""
+        return self._by_name.get(name.lower())
+
+    def get_by_table(self, tablename: str) -> t.Optional[ModelType]:
+        """Get a model by its table name."""
+        return self._by_table.get(tablename)
+
+    def blueprint_models(self, blueprint: str) -> t.List[ModelType]:
+        """Get the models that a blueprint brought to the registry."""
+        return self._by_blueprint.get(blueprint, [])
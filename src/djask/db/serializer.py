@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from operator import attrgetter
+from operator import itemgetter
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
+
+# A tree of relationship names, e.g. ``{"author": {}, "comments": {"author": {}}}``,
+# typed loosely as mypy can't resolve recursive aliases
+ExpandTree = Dict[str, Any]
+
+
+def _compile_getter(keys: tuple[str, ...]) -> Callable[[Any], tuple]:
+    """Build a function returning the values of ``keys`` of an instance.
+
+    The values are read straight from the instance ``__dict__``, which is
+    much faster than going through the instrumented attributes, and only
+    fall back to the attributes when some of them are expired or deferred.
+    """
+    if not keys:
+        return lambda obj: ()
+    get_items: Callable[[Any], tuple] = itemgetter(*keys)
+    get_attrs: Callable[[Any], tuple] = attrgetter(*keys)
+    if len(keys) == 1:
+        get_item, get_attr = get_items, get_attrs
+        get_items = lambda d: (get_item(d),)  # noqa: E731
+        get_attrs = lambda obj: (get_attr(obj),)  # noqa: E731
+
+    def getter(obj: Any) -> tuple:
+        try:
+            return get_items(obj.__dict__)
+        except KeyError:
+            return get_attrs(obj)
+
+    return getter
+
+
+class ModelSerializer:
+    """
+    Convert instances of a model to dicts.
+
+    Everything that depends only on the model class, i.e. the column list,
+    the hidden columns and the relationships, is computed once here instead of
+    on every :meth:`~djask.db.models.BaseModel.to_dict` call.
+
+    .. versionadded:: 0.7.0
+
+    :param model: The model class to serialize
+    """
+
+    def __init__(self, model: type) -> None:
+        meta = model.get_meta()  # type: ignore
+        self.model = model
+        self.columns = tuple(key for key in meta.columns if key not in meta.hidden)
+        # relationship key -> (uselist, keys to exclude from the related items)
+        self.relationships = {
+            key: (prop.uselist, frozenset(p.key for p in prop._reverse_property))
+            for key, prop in meta.relationships.items()
+        }
+        self.targets = {
+            key: prop.mapper.class_ for key, prop in meta.relationships.items()
+        }
+        self._plans: dict[frozenset[str], tuple] = {}
+
+    def _plan(self, exclude: frozenset[str]) -> tuple:
+        plan = self._plans.get(exclude)
+        if plan is None:
+            columns = tuple(key for key in self.columns if key not in exclude)
+            relationships = tuple(
+                (key, *value)
+                for key, value in self.relationships.items()
+                if key not in exclude
+            )
+            plan = self._plans[exclude] = (
+                columns,
+                _compile_getter(columns),
+                relationships,
+            )
+        return plan
+
+    def resolve_expand(self, tree: ExpandTree) -> ExpandTree:
+        """Check the relationship names of an expand tree and replace the
+        ``*`` wildcards with all the relationships of their level.
+
+        :param tree: The expand tree to resolve
+        :raises ValueError: if a name is not a relationship of its model
+        """
+        resolved: ExpandTree = {}
+        for key, subtree in tree.items():
+            for name in self.relationships if key == "*" else (key,):
+                if name not in self.relationships:
+                    raise ValueError(
+                        f"Model {self.model.__name__} has no relationship {name}."
+                    )
+                node = resolved.setdefault(name, {})
+                if subtree:
+                    node.update(
+                        self.targets[name].get_serializer().resolve_expand(subtree)
+                    )
+        return resolved
+
+    def loader_options(self, tree: ExpandTree) -> list:
+        """Build the loader options eagerly loading the relationships of a
+        resolved expand tree.
+
+        Collections are loaded with ``selectinload`` and scalars with
+        ``joinedload``, so the number of queries only depends on the tree.
+
+        :param tree: A tree returned by :meth:`resolve_expand`
+        """
+        options = []
+        for key, subtree in tree.items():
+            uselist = self.relationships[key][0]
+            loader = (selectinload if uselist else joinedload)(getattr(self.model, key))
+            if subtree:
+                loader = loader.options(
+                    *self.targets[key].get_serializer().loader_options(subtree)
+                )
+            options.append(loader)
+        return options
+
+    def serialize(
+        self,
+        instance: Any,
+        exclude: Iterable[str] | None = None,
+        expand: ExpandTree | None = None,
+    ) -> dict[str, Any]:
+        """Convert ``instance`` to a dict.
+
+        :param instance: An instance of the model
+        :param exclude: The names of the attributes to leave out
+        :param expand: A resolved expand tree of the relationships to include.
+            The relationships left out of the tree are not serialized, only
+            their foreign key columns are.  If ``None``, all the relationships
+            are serialized recursively.
+        """
+        if not isinstance(exclude, frozenset):
+            exclude = frozenset(exclude or ())
+        columns, getter, relationships = self._plan(exclude)
+        result = dict(zip(columns, getter(instance)))
+        if expand is not None:
+            for key, subtree in expand.items():
+                if key in exclude:
+                    continue
+                attribute = getattr(instance, key)
+                if self.relationships[key][0]:
+                    result[key] = [item.to_dict(expand=subtree) for item in attribute]
+                else:
+                    result[key] = (
+                        None if attribute is None else attribute.to_dict(expand=subtree)
+                    )
+            return result
+        for key, uselist, back in relationships:
+            attribute = getattr(instance, key)
+            if uselist:
+                result[key] = [
+                    item.to_dict(exclude=back)
+                    for item in attribute
+                    if hasattr(item, "to_dict")
+                ]
+            elif hasattr(attribute, "to_dict"):
+                result[key] = attribute.to_dict(exclude=back)
+        return result
@@ -1,13 +1,13 @@
 from flask_bootstrap import Bootstrap5
-from flask_compress import Compress
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf import CSRFProtect
 
+from .compression import AdaptiveCompress
 from .db import Model
 
 bootstrap = Bootstrap5()
-compress = Compress()
+compress = AdaptiveCompress()
 csrf = CSRFProtect()
 db = SQLAlchemy(model_class=Model)
 login_manager = LoginManager()
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import datetime as dt
+import typing as t
+from hashlib import sha1
+from hashlib import sha256
 from time import time
 
 from authlib.jose import JoseError
@@ -10,6 +14,8 @@ from wtforms import SubmitField
 from wtforms_sqlalchemy.orm import model_form
 
 from .auth.abstract import AbstractUser
+from .auth.identity import UserCache
+from .db.serializer import ExpandTree
 from .extensions import db
 from .globals import current_app
 from .globals import g
@@ -23,8 +29,18 @@ def get_model_form(model_name: str) -> tuple[ModelType, FlaskForm]:
     :param model_name: The name of the model
     :return: A tuple of the model and the form
     .. versionadded: 0.1.0
+    .. versionchanged: 0.7.0
+        The form class is built once per model and app.
     """
     model = current_app.get_model_by_name(model_name)  # type: ignore
+    cache = current_app.model_registry.cache  # type: ignore
+    ModelForm = cache.get(("form", model))
+    if ModelForm is None:
+        ModelForm = cache[("form", model)] = _build_model_form(model)
+    return model, ModelForm()
+
+
+def _build_model_form(model: ModelType) -> type[FlaskForm]:
     if model != g.User:  # pragma: no cover
         ModelForm = model_form(model, base_class=FlaskForm, db_session=db.session)
     else:
@@ -36,7 +52,82 @@ def get_model_form(model_name: str) -> tuple[ModelType, FlaskForm]:
         )
         ModelForm.password = PasswordField("password")
     ModelForm.submit = SubmitField()
-    return model, ModelForm()
+    return ModelForm
+
+
+def parse_expand(value: str, max_depth: int | None = None) -> ExpandTree:
+    """Parse an ``expand`` query argument into a tree of relationship names.
+
+    ``"author,comments.author"`` gives ``{"author": {}, "comments": {"author": {}}}``.
+
+    :param value: Comma-separated dotted paths of relationships
+    :param max_depth: The maximum number of relationships in a path
+    :raises ValueError: if a path is deeper than ``max_depth``
+    .. versionadded: 0.7.0
+    """
+    tree: ExpandTree = {}
+    for path in value.split(","):
+        keys = [key.strip() for key in path.split(".") if key.strip()]
+        if max_depth is not None and len(keys) > max_depth:
+            raise ValueError(f"Cannot expand {path.strip()} deeper than {max_depth}.")
+        node = tree
+        for key in keys:
+            node = node.setdefault(key, {})
+    return tree
+
+
+def make_etag(
+    model: ModelType,
+    identity: t.Sequence[t.Any],
+    updated_at: dt.datetime | None,
+    related: t.Iterable[tuple[str, t.Any, dt.datetime | None]] | None = None,
+) -> str:
+    """Make the strong ETag of an instance from its primary key and ``updated_at``.
+
+    The ETag of a representation holding related instances carries a digest
+    of their versions after a ``-``, so it changes when one of them does,
+    while the part before it still identifies the version of the instance.
+
+    :param model: The model of the instance
+    :param identity: The primary key of the instance
+    :param updated_at: The last update time of the instance
+    :param related: The model names, primary keys and last update times of
+        the related instances in the representation
+    .. versionadded: 0.7.0
+    """
+    data = "{}:{}:{}".format(
+        model.__name__,
+        ",".join(map(str, identity)),
+        "" if updated_at is None else updated_at.isoformat(),
+    )
+    etag = sha1(data.encode()).hexdigest()
+    if related is not None:
+        digest = sha1()
+        for name, key, related_updated_at in related:
+            digest.update(
+                "{}:{}:{};".format(
+                    name,
+                    ",".join(map(str, key)),
+                    "" if related_updated_at is None else related_updated_at,
+                ).encode()
+            )
+        etag = f"{etag}-{digest.hexdigest()}"
+    return etag
+
+
+def _token_cache() -> UserCache | None:
+    if not current_app.config["DJASK_TOKEN_CACHE_TTL"]:
+        return None
+    cache = current_app.extensions.get("djask_token_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "djask_token_cache",
+            UserCache(
+                current_app.config["DJASK_TOKEN_CACHE_SIZE"],
+                current_app.config["DJASK_TOKEN_CACHE_TTL"],
+            ),
+        )
+    return cache
 
 
 def get_user_from_token(token: str) -> AbstractUser | None:
@@ -45,7 +136,16 @@ def get_user_from_token(token: str) -> AbstractUser | None:
     :param token: The access token
     :return: A user
     .. versionadded: 0.3.0
+    .. versionchanged: 0.7.0
+        The verified tokens and their users are cached for
+        ``DJASK_TOKEN_CACHE_TTL`` seconds, or until the users are updated.
     """
+    cache = _token_cache()
+    key = sha256(token.encode()).digest()
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0]
     try:
         data = jwt.decode(token.encode("ascii"), current_app.config["SECRET_KEY"])
         current = time()
@@ -57,7 +157,10 @@ def get_user_from_token(token: str) -> AbstractUser | None:
         return None
     except JoseError:  # pragma: no cover
         return None
-    return g.User.query.get(data.get("id"))
+    user = g.User.query.get(data.get("id"))
+    if cache is not None and user is not None:
+        cache.set(key, user, dict(data), ttl=created + expiration - current)
+    return user
 
 
 def get_user_from_headers() -> AbstractUser | None:
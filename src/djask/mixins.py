@@ -1,5 +1,8 @@
+import typing as t
 from typing import Iterable
 
+from .caching import cached
+from .db.registry import ModelRegistry
 from .exceptions import ModelTypeError
 from .types import ModelList
 from .types import ModelType
@@ -16,9 +19,30 @@ class ModelFunctionalityMixin:
     .. versionadded:: 0.1.0
 
     .. versionchanged:: 0.4.0
+
+    .. versionchanged:: 0.7.0
+        Models are kept in a per-object :class:`~djask.db.registry.ModelRegistry`.
     """
 
-    models: ModelList = []
+    @property
+    def model_registry(self) -> ModelRegistry:
+        """The indexed registry of the models registered on this object.
+
+        .. versionadded:: 0.7.0
+        """
+        registry = self.__dict__.get("_model_registry")
+        if registry is None:
+            registry = self.__dict__["_model_registry"] = ModelRegistry()
+        return registry
+
+    @property
+    def models(self) -> ModelList:
+        """The models registered directly on this object, in registration order.
+
+        Use :meth:`register_model` instead of appending to this list,
+        otherwise the model won't be indexed.
+        """
+        return self.model_registry.models
 
     def model(self, model: ModelType) -> ModelType:
         """
@@ -39,7 +63,7 @@ class ModelFunctionalityMixin:
         """
         if not isinstance(model, type(Model)):
             raise ModelTypeError
-        self.models.append(model)
+        self.model_registry.add(model)
 
     def register_models(self, models: Iterable[ModelType]) -> None:
         """
@@ -50,3 +74,40 @@ class ModelFunctionalityMixin:
         """
         for model in models:
             self.register_model(model)
+
+
+class ViewCacheMixin:
+    """
+    A mixin that adds the :meth:`cache` decorator to the classes which inherit it.
+
+    .. versionadded:: 0.7.0
+    """
+
+    def cache(
+        self,
+        timeout: t.Optional[float] = None,
+        models: Iterable[ModelType] = (),
+        headers: Iterable[str] = (),
+    ) -> t.Callable[[t.Callable], t.Callable]:
+        """
+        A decorator to cache the responses of a view to ``GET`` requests.
+
+        The responses are cached per endpoint, path, query string and the
+        values of ``headers``, in the backend set by ``DJASK_CACHE_BACKEND``.
+        Committing a change to one of ``models`` invalidates the responses.
+        Put it below the route decorator::
+
+            @app.get("/articles")
+            @app.cache(models=[Article])
+            def articles():
+                ...
+
+        .. versionadded:: 0.7.0
+
+        :param timeout: The lifetime of a response in seconds,
+            ``DJASK_CACHE_TIMEOUT`` by default
+        :param models: The models the view reads
+        :param headers: The request headers the response depends on, e.g.
+            ``Cookie`` for the views showing the current user
+        """
+        return cached(timeout, models, headers)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import threading
+import typing as t
+from collections import OrderedDict
+from time import monotonic
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class TTLCache(t.Generic[K, V]):
+    """
+    A thread-safe, bounded mapping whose entries expire.
+
+    The least recently used entry is dropped when the cache is full, and an
+    entry is dropped when it is read after its expiry time.
+
+    .. versionadded:: 0.7.0
+
+    :param maxsize: The maximum number of entries
+    :param ttl: The default lifetime of an entry in seconds
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Get the value of a key if it has not expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            if item[0] <= monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Set the value of a key.
+
+        :param ttl: The lifetime of the entry, ``ttl`` of the cache by default
+        """
+        expires = monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """Remove a key and return its value, expired or not."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return None if item is None else item[1]
+
+    def discard_if(self, predicate: t.Callable[[K, V], bool]) -> None:
+        """Remove the entries for which ``predicate(key, value)`` is true."""
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
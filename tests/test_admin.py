@@ -72,3 +72,33 @@ def test_custom_prefix(app, client):
     db.session.commit()
 
     client.post("/abcd/login", data={"username": "test", "password": "test"})
+
+
+def test_user_cache(admin, client):
+    import sqlalchemy as sa
+
+    from djask.admin.ext import load_user
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    assert load_user("1").username == "test"
+    db.session.expunge_all()
+    sa.event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        assert load_user("1").username == "test"
+        assert statements == []
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", count)
+
+    # updating the user drops it from the cache
+    User.query.filter_by(id=1).update({"username": "renamed"})
+    db.session.commit()
+    assert load_user("1").username == "renamed"
+    user = User.query.get(1)
+    db.session.delete(user)
+    db.session.commit()
+    assert load_user("1") is None
+    assert load_user("abc") is None
@@ -1,6 +1,9 @@
 import typing as t
 
+import sqlalchemy as sa
+
 from djask.auth.models import User
+from djask.caching import get_view_cache
 from djask.db import Model
 from djask.extensions import db
 
@@ -142,3 +145,675 @@ def test_new_model(admin, client):
 def test_model_not_existing(admin, client):
     resp = client.get("/admin/api/fake/1", headers=admin_headers(client))
     assert resp.status_code == 404
+
+
+def test_list_instances(admin, client):
+    @admin.model
+    class Note(Model):
+        __table_args__ = {"extend_existing": True}
+        title = db.Column(db.String(255), index=True)
+        content = db.Column(db.Text)
+
+    db.create_all()
+    db.session.add_all(Note(title=f"{i % 4}", content=str(i)) for i in range(10))
+    db.session.commit()
+    headers = admin_headers(client)
+
+    def walk(order_by, direction="next", cursor=None):
+        pages = []
+        while True:
+            url = f"/admin/api/note?per_page=3&order_by={order_by}"
+            if cursor is not None:
+                url += f"&cursor={cursor}"
+            resp = client.get(url, headers=headers)
+            assert resp.status_code == 200
+            pages.append([item["id"] for item in resp.json["items"]])
+            cursor = resp.json[direction]
+            if cursor is None:
+                return pages, resp.json
+
+    pages, last = walk("id")
+    assert pages == [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]]
+    assert last["prev"] is not None
+    resp = client.get(f"/admin/api/note?cursor={last['prev']}", headers=headers)
+    assert [item["id"] for item in resp.json["items"]][-1] == 9
+
+    pages, _ = walk("-title")
+    ids = [i for page in pages for i in page]
+    notes = sorted(Note.query.all(), key=lambda n: (n.title, n.id), reverse=True)
+    assert ids == [n.id for n in notes]
+
+    resp = client.get("/admin/api/note?order_by=content", headers=headers)
+    assert resp.status_code == 400
+    resp = client.get("/admin/api/note?cursor=abc", headers=headers)
+    assert resp.status_code == 400
+    resp = client.get("/admin/api/note?per_page=1000", headers=headers)
+    assert resp.status_code == 400
+
+
+def test_list_instances_expand(admin, client):
+    @admin.model
+    class Shelf(Model):
+        __table_args__ = {"extend_existing": True}
+        name = db.Column(db.String(32))
+
+    @admin.model
+    class Binder(Model):
+        __table_args__ = {"extend_existing": True}
+        shelf_id = db.Column(db.ForeignKey("shelf.id"))
+        shelf = db.relationship("Shelf", backref="binders")
+
+    @admin.model
+    class Sheet(Model):
+        __table_args__ = {"extend_existing": True}
+        binder_id = db.Column(db.ForeignKey("binder.id"))
+        binder = db.relationship("Binder", backref="sheets")
+
+    db.create_all()
+    for i in range(5):
+        db.session.add(Shelf(name=str(i), binders=[Binder(sheets=[Sheet(), Sheet()])]))
+    db.session.commit()
+    headers = admin_headers(client)
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa.event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        statements.clear()
+        resp = client.get("/admin/api/shelf?per_page=5", headers=headers)
+        # the page holds the columns only, without querying the relationships
+        assert "binders" not in resp.json["items"][0]
+        assert len(statements) <= 2
+        statements.clear()
+        resp = client.get(
+            "/admin/api/shelf?per_page=5&expand=binders.sheets", headers=headers
+        )
+        assert len(resp.json["items"][0]["binders"][0]["sheets"]) == 2
+        assert len(statements) <= 4
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", count)
+
+
+def test_list_instances_null_keys(admin, client):
+    db.session.add_all(User(username=None) for _ in range(3))
+    db.session.add_all(User(username=f"user{i}") for i in range(2))
+    db.session.commit()
+    headers = admin_headers(client)
+
+    def walk(order_by, direction="next", cursor=None):
+        ids = []
+        while True:
+            url = f"/admin/api/user?per_page=2&order_by={order_by}"
+            if cursor is not None:
+                url += f"&cursor={cursor}"
+            resp = client.get(url, headers=headers)
+            assert resp.status_code == 200
+            page = [item["id"] for item in resp.json["items"]]
+            ids = ids + page if direction == "next" else page + ids
+            cursor = resp.json[direction]
+            if cursor is None:
+                return ids, resp.json
+
+    # the NULLs sort last
+    users = sorted(
+        User.query.all(), key=lambda u: (u.username is None, u.username or "", u.id)
+    )
+    expected = [u.id for u in users]
+    ids, last = walk("username")
+    assert ids == expected
+    ids, _ = walk("username", "prev", last["prev"])
+    assert ids == expected[: -len(last["items"])]
+    ids, last = walk("-username")
+    assert ids == expected[::-1]
+    ids, _ = walk("-username", "prev", last["prev"])
+    assert ids == expected[::-1][: -len(last["items"])]
+
+
+def test_bulk_create(admin, client):
+    @admin.model
+    class Memo(Model):
+        __table_args__ = {"extend_existing": True}
+        title = db.Column(db.String(255), nullable=False)
+        views = db.Column(db.Integer)
+
+    db.create_all()
+    rows = [{"title": str(i), "views": i} for i in range(25)]
+    rows[3] = {"views": 3}  # missing title
+    rows[12]["views"] = "many"
+    resp = client.post(
+        "/admin/api/memo/bulk?chunk_size=10", json=rows, headers=admin_headers(client)
+    )
+    assert resp.status_code == 201
+    assert resp.json["created"] == 23
+    assert [c["created"] for c in resp.json["chunks"]] == [9, 9, 5]
+    assert "title" in resp.json["chunks"][0]["errors"]["3"]
+    assert "views" in resp.json["chunks"][1]["errors"]["12"]
+    assert Memo.query.count() == 23
+    assert Memo.query.filter_by(title="24").first().created_at is not None
+
+    # the cached views reading the model are invalidated
+    backend = get_view_cache(admin).backend
+    generations = backend.get_generations(["memo"])
+    resp = client.post(
+        "/admin/api/memo/bulk", json=[{"title": "new"}], headers=admin_headers(client)
+    )
+    assert resp.status_code == 201
+    assert backend.get_generations(["memo"]) != generations
+
+    resp = client.post(
+        "/admin/api/memo/bulk", json={"title": "x"}, headers=admin_headers(client)
+    )
+    assert resp.status_code == 400
+
+
+def test_bulk_update_and_delete(admin, client):
+    @admin.model
+    class Ticket(Model):
+        __table_args__ = {"extend_existing": True}
+        status = db.Column(db.String(32))
+        owner_id = db.Column(db.Integer)
+
+    db.create_all()
+    db.session.add_all(Ticket(status="open", owner_id=i % 3) for i in range(30))
+    db.session.commit()
+    headers = admin_headers(client)
+
+    body = {"filter": {"owner_id": {"in": [0, 1]}, "id": {"gt": 5}}}
+    resp = client.patch("/admin/api/ticket/bulk?dry_run=1", json=body, headers=headers)
+    assert resp.json == {"matched": 16}
+    body["values"] = {"status": "archived"}
+    resp = client.patch("/admin/api/ticket/bulk", json=body, headers=headers)
+    assert resp.json == {"updated": 16}
+    assert Ticket.query.filter_by(status="archived").count() == 16
+
+    body = {"filter": {"status": "archived"}}
+    resp = client.delete("/admin/api/ticket/bulk?dry_run=1", json=body, headers=headers)
+    assert resp.json == {"matched": 16}
+    assert Ticket.query.count() == 30
+    resp = client.delete(
+        "/admin/api/ticket/bulk?chunk_size=5", json=body, headers=headers
+    )
+    assert resp.json == {"deleted": 16}
+    assert Ticket.query.count() == 14
+
+    for body in (
+        {"filter": {}},
+        {"filter": {"nope": 1}},
+        {"filter": {"owner_id": {"like": 1}}},
+        {"filter": {"owner_id": "abc"}},
+    ):
+        resp = client.delete("/admin/api/ticket/bulk", json=body, headers=headers)
+        assert resp.status_code == 400
+    resp = client.patch(
+        "/admin/api/ticket/bulk",
+        json={"filter": {"owner_id": 1}, "values": {"owner_id": "x"}},
+        headers=headers,
+    )
+    assert resp.status_code == 400
+    resp = client.patch(
+        "/admin/api/ticket/bulk",
+        json={"filter": {"owner_id": 1}, "values": {"id": 1}},
+        headers=headers,
+    )
+    assert resp.status_code == 400
+    assert b"primary key" in resp.data
+
+
+def test_bulk_integrity_errors(admin, client):
+    @admin.model
+    class Crate(Model):
+        __table_args__ = {"extend_existing": True}
+        name = db.Column(db.String(32))
+
+    @admin.model
+    class Label(Model):
+        __table_args__ = {"extend_existing": True}
+        crate_id = db.Column(db.ForeignKey("crate.id"), nullable=False)
+
+    db.create_all()
+    db.session.execute(sa.text("PRAGMA foreign_keys=ON"))
+    crate = Crate(name="a")
+    db.session.add(crate)
+    db.session.flush()
+    db.session.add(Label(crate_id=crate.id))
+    db.session.commit()
+    db.session.execute(sa.text("PRAGMA foreign_keys=ON"))
+    headers = admin_headers(client)
+
+    resp = client.patch(
+        "/admin/api/label/bulk",
+        json={"filter": {"crate_id": crate.id}, "values": {"crate_id": 999}},
+        headers=headers,
+    )
+    assert resp.status_code == 400
+    assert Label.query.one().crate_id == crate.id
+    resp = client.delete(
+        "/admin/api/crate/bulk", json={"filter": {"name": "a"}}, headers=headers
+    )
+    assert resp.status_code == 400
+    assert Crate.query.count() == 1
+
+
+def test_export(admin, client):
+    import gzip
+    import json
+    import zlib
+
+    @admin.model
+    class Entry(Model):
+        __table_args__ = {"extend_existing": True}
+        title = db.Column(db.String(255))
+
+    db.create_all()
+    db.session.add_all(Entry(title=f"title {i}") for i in range(50))
+    db.session.commit()
+    headers = admin_headers(client)
+
+    resp = client.get("/admin/api/entry/export", headers=headers)
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == "application/x-ndjson"
+    lines = resp.get_data(as_text=True).splitlines()
+    assert len(lines) == 50
+    # the first row is sent on its own, the others are batched
+    resp = client.get("/admin/api/entry/export", headers=headers)
+    chunks = list(resp.response)
+    assert chunks[0].decode().count("\n") == 1
+    assert len(chunks) == 2
+    assert json.loads(lines[-1])["title"] == "title 49"
+
+    resp = client.get(
+        "/admin/api/entry/export?format=csv",
+        headers={**headers, "Accept-Encoding": "gzip"},
+    )
+    assert resp.headers["Content-Encoding"] == "gzip"
+    rows = gzip.decompress(resp.get_data()).decode().splitlines()
+    assert rows[0] == "id,created_at,updated_at,title"
+    assert rows[1].endswith(",title 0")
+    assert len(rows) == 51
+    # the gzipped chunks are flushed one by one, starting with the first row
+    resp = client.get(
+        "/admin/api/entry/export?format=csv",
+        headers={**headers, "Accept-Encoding": "gzip"},
+    )
+    chunks = list(resp.response)
+    assert len(chunks) == 3
+    first = zlib.decompressobj(31).decompress(chunks[0]).decode()
+    assert first.splitlines()[1].endswith(",title 0")
+
+    resp = client.get("/admin/api/entry/export?format=xml", headers=headers)
+    assert resp.status_code == 400
+
+
+def test_conditional_requests(admin, client):
+    @admin.model
+    class Page(Model):
+        __table_args__ = {"extend_existing": True}
+        title = db.Column(db.String(255))
+
+    db.create_all()
+    page = Page(title="abc")
+    db.session.add(page)
+    db.session.commit()
+    headers = admin_headers(client)
+
+    resp = client.get(f"/admin/api/page/{page.id}", headers=headers)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    last_modified = resp.headers["Last-Modified"]
+
+    resp = client.get(
+        f"/admin/api/page/{page.id}", headers={"If-None-Match": etag, **headers}
+    )
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.data == b""
+    resp = client.get(
+        f"/admin/api/page/{page.id}",
+        headers={"If-Modified-Since": last_modified, **headers},
+    )
+    assert resp.status_code == 304
+    resp = client.get("/admin/api/page/100", headers={"If-None-Match": etag, **headers})
+    assert resp.status_code == 404
+
+    # a stale ETag doesn't match
+    resp = client.put(
+        f"/admin/api/page/{page.id}",
+        json={"title": "new"},
+        headers={"If-Match": '"stale"', **headers},
+    )
+    assert resp.status_code == 412
+    assert Page.query.get(page.id).title == "abc"
+
+    resp = client.put(
+        f"/admin/api/page/{page.id}",
+        json={"title": "new"},
+        headers={"If-Match": etag, **headers},
+    )
+    assert resp.status_code == 200
+    assert resp.json["title"] == "new"
+    assert resp.headers["ETag"] != etag
+    assert Page.query.get(page.id).updated_at > Page.query.get(page.id).created_at
+
+    resp = client.get(
+        f"/admin/api/page/{page.id}", headers={"If-None-Match": etag, **headers}
+    )
+    assert resp.status_code == 200
+    resp = client.delete(
+        f"/admin/api/page/{page.id}", headers={"If-Match": etag, **headers}
+    )
+    assert resp.status_code == 412
+
+
+def test_conditional_requests_compressed(admin, client):
+    @admin.model
+    class Pamphlet(Model):
+        __table_args__ = {"extend_existing": True}
+        body = db.Column(db.Text)
+
+    db.create_all()
+    pamphlet = Pamphlet(body="abc" * 300)
+    db.session.add(pamphlet)
+    db.session.commit()
+    headers = {"Accept-Encoding": "gzip", **admin_headers(client)}
+    assert len(pamphlet.body) > admin.config["COMPRESS_MIN_SIZE"]
+
+    resp = client.get(f"/admin/api/pamphlet/{pamphlet.id}", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.vary
+    etag = resp.headers["ETag"]
+    assert etag.endswith(':gzip"')
+
+    resp = client.get(
+        f"/admin/api/pamphlet/{pamphlet.id}", headers={"If-None-Match": etag, **headers}
+    )
+    assert resp.status_code == 304
+    resp = client.put(
+        f"/admin/api/pamphlet/{pamphlet.id}",
+        json={"body": "new" * 300},
+        headers={"If-Match": etag, **headers},
+    )
+    assert resp.status_code == 200
+
+
+def test_conditional_requests_expand(admin, client):
+    @admin.model
+    class Thread(Model):
+        __table_args__ = {"extend_existing": True}
+        title = db.Column(db.String(255))
+
+    @admin.model
+    class Reply(Model):
+        __table_args__ = {"extend_existing": True}
+        body = db.Column(db.String(255))
+        thread_id = db.Column(db.ForeignKey("thread.id"))
+        thread = db.relationship("Thread", backref="replies")
+
+    db.create_all()
+    thread = Thread(title="abc", replies=[Reply(body="first")])
+    db.session.add(thread)
+    db.session.commit()
+    headers = admin_headers(client)
+    url = f"/admin/api/thread/{thread.id}?expand=replies"
+
+    resp = client.get(url, headers=headers)
+    etag = resp.headers["ETag"]
+    resp = client.get(url, headers={"If-None-Match": etag, **headers})
+    assert resp.status_code == 304
+    # so does the tag of a compressed copy
+    gzip_etag = etag[:-1] + ':gzip"'
+    resp = client.get(url, headers={"If-None-Match": gzip_etag, **headers})
+    assert resp.status_code == 304
+
+    # a change to an expanded instance changes the ETag
+    reply = Reply.query.first()
+    reply.body = "edited"
+    db.session.commit()
+    resp = client.get(url, headers={"If-None-Match": etag, **headers})
+    assert resp.status_code == 200
+    assert resp.json["replies"][0]["body"] == "edited"
+    db.session.add(Reply(body="second", thread_id=thread.id))
+    db.session.commit()
+    resp = client.get(url, headers={"If-None-Match": resp.headers["ETag"], **headers})
+    assert resp.status_code == 200
+    assert len(resp.json["replies"]) == 2
+
+    # the write preconditions only check the thread itself
+    resp = client.put(url, json={"title": "new"}, headers={"If-Match": etag, **headers})
+    assert resp.status_code == 200
+
+
+def test_token_cache(admin, client):
+    import sqlalchemy as sa
+
+    headers = admin_headers(client)
+    u = User.query.filter_by(username="test").first()
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa.event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        assert client.get("/admin/api/user/1", headers=headers).status_code == 200
+        db.session.expunge_all()
+        statements.clear()
+        assert client.get("/admin/api/user/1", headers=headers).status_code == 200
+        # the user of the token comes from the cache and is put in the
+        # session, so the view doesn't query it either
+        assert statements == []
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", count)
+
+    # updating the user drops it from the cache
+    u = User.query.get(u.id)
+    u.is_admin = False
+    db.session.commit()
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 403
+    User.query.filter_by(id=u.id).update({"is_admin": True})
+    db.session.commit()
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 200
+    User.query.filter_by(id=u.id).update({"is_admin": False})
+    db.session.commit()
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 403
+
+
+def test_create_users(admin, client):
+    headers = admin_headers(client)
+    users = [{"username": f"bulk{i}", "password": f"pw{i}"} for i in range(5)]
+    resp = client.post("/admin/api/user/bulk", json=users, headers=headers)
+    assert resp.status_code == 201
+    assert resp.json["created"] == 5
+    user = User.query.get(resp.json["ids"][2])
+    assert user.username == "bulk2"
+    assert user.check_password("pw2")
+    assert user.permissions is None
+    assert user.has_permission("user_read")
+
+    resp = client.post(
+        "/admin/api/user/bulk", json=[{"username": "nopassword"}], headers=headers
+    )
+    assert resp.status_code == 400
+    resp = client.post("/admin/api/user/bulk", json=users[:1], headers=headers)
+    assert resp.status_code == 400
+    assert User.query.count() == 6
+
+    # the passwords are hashed side by side on the pool
+    admin.config["DJASK_PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    admin.config["DJASK_PASSWORD_HASH_WORKERS"] = 2
+    created = User.create_users(
+        [{"username": f"pool{i}", "password": f"pw{i}"} for i in range(4)]
+    )
+    assert all(u.password_hash.startswith("pbkdf2:sha256:1000$") for u in created)
+    assert created[3].check_password("pw3")
+
+
+def test_password_rehash(admin, client, app):
+    user = User.query.filter_by(username="test").first()
+    assert user.password_hash.startswith("pbkdf2:sha256:260000$")
+    app.config["DJASK_PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    app.config["DJASK_PASSWORD_HASH_WORKERS"] = 2
+    resp = client.post(
+        "/admin/api/token", data={"username": "test", "password": "wrong"}
+    )
+    assert resp.status_code == 400
+    db.session.expire_all()
+    assert User.query.get(user.id).password_hash.startswith("pbkdf2:sha256:260000$")
+    assert (
+        client.post(
+            "/admin/api/token", data={"username": "test", "password": "test"}
+        ).status_code
+        == 200
+    )
+    db.session.expire_all()
+    user = User.query.get(user.id)
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert user.check_password("test")
+
+    # the threads of a replaced hasher are stopped
+    from djask.auth.hashing import get_hasher
+
+    hasher = get_hasher()
+    app.config["DJASK_PASSWORD_HASH_WORKERS"] = 1
+    assert get_hasher() is not hasher
+    assert hasher._executor._shutdown
+
+
+def test_refresh_token(admin, client):
+    resp = client.post(
+        "/admin/api/token", data={"username": "test", "password": "test"}
+    )
+    assert resp.json["expires_in"] == 3600
+    refresh = resp.json["refresh_token"]
+
+    resp = client.post("/admin/api/token/refresh", data={"refresh_token": refresh})
+    assert resp.status_code == 200
+    rotated = resp.json["refresh_token"]
+    assert rotated != refresh
+    headers = {"Authorization": resp.json["access_token"]}
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 200
+
+    # reusing a refresh token revokes all the tokens of its family
+    resp = client.post("/admin/api/token/refresh", data={"refresh_token": refresh})
+    assert resp.status_code == 400
+    resp = client.post("/admin/api/token/refresh", data={"refresh_token": rotated})
+    assert resp.status_code == 400
+
+    resp = client.post("/admin/api/token/refresh", data={"refresh_token": "forged"})
+    assert resp.status_code == 400
+
+
+def test_token_claims(admin, client, app):
+    import sqlalchemy as sa
+
+    app.config["DJASK_TOKEN_CLAIMS"] = True
+    headers = admin_headers(client)
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa.event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        assert client.get("/admin/api/user/1", headers=headers).status_code == 200
+        db.session.expunge_all()
+        statements.clear()
+        assert client.get("/admin/api/user/1", headers=headers).status_code == 200
+        # only the view queries, the request is authorized from the token
+        assert len(statements) == 1
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", count)
+
+    # demoting the user revokes the token at once
+    u = User.query.get(1)
+    u.is_admin = False
+    db.session.commit()
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 403
+    u.is_admin = True
+    db.session.commit()
+    # the old token stays revoked, a new one has the new generation
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 403
+    headers = admin_headers(client)
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 200
+
+    # so do bulk updates through the API
+    resp = client.patch(
+        "/admin/api/user/bulk",
+        json={"filter": {"id": 1}, "values": {"permissions": None}},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert client.get("/admin/api/user/1", headers=headers).status_code == 403
+
+    # the generations live in their own table, a user may have no row yet
+    from djask.auth.models import TokenGeneration
+
+    assert "token_generation" not in sa.inspect(User).columns
+    other = User(username="other", is_admin=True)
+    other.set_password("other")
+    db.session.add(other)
+    db.session.commit()
+    other_headers = admin_headers(client, "other", "other")
+    assert TokenGeneration.query.filter_by(user_id=other.id).first() is None
+    resp = client.patch(
+        "/admin/api/user/bulk",
+        json={"filter": {"username": "other"}, "values": {"permissions": None}},
+        headers=other_headers,
+    )
+    assert resp.status_code == 200
+    assert TokenGeneration.query.filter_by(user_id=other.id).one().generation == 1
+    assert client.get("/admin/api/user/1", headers=other_headers).status_code == 403
+
+
+def test_generations_dropped_on_commit(admin, client):
+    from djask.auth.claims import _generation_cache
+    from djask.auth.claims import token_generation
+
+    u = User.query.filter_by(username="test").first()
+    generation = token_generation(User, u.id)
+
+    # a request reading the former row between the flush and the commit
+    # caches it again, which the commit drops
+    u.is_admin = False
+    db.session.flush()
+    _generation_cache().set((User, u.id), generation)
+    db.session.commit()
+    assert _generation_cache().get((User, u.id)) is None
+    assert token_generation(User, u.id) == generation + 1
+
+    # so do the bulk updates
+    User.query.filter_by(id=u.id).update({"is_admin": True})
+    _generation_cache().set((User, u.id), generation)
+    db.session.commit()
+    assert _generation_cache().get((User, u.id)) is None
+
+
+def test_user_snapshots_dropped_on_commit(admin, client):
+    from djask.auth.identity import UserCache
+
+    users = UserCache(10, 60)
+    u = User.query.filter_by(username="test").first()
+
+    # a request reading the former row between the flush and the commit
+    # caches it again, which the commit drops
+    u.is_admin = False
+    db.session.flush()
+    users.set("token", u)
+    db.session.commit()
+    assert users.get("token") is None
+
+    # so do the bulk updates
+    User.query.filter_by(id=u.id).update({"is_admin": True})
+    users.set("token", u)
+    db.session.commit()
+    assert users.get("token") is None
+
+    # a rolled back change keeps them
+    u.is_admin = False
+    db.session.flush()
+    users.set("token", u)
+    db.session.rollback()
+    assert users.get("token") is not None
@@ -7,3 +7,50 @@ def test_new_model(app):
         __table_args__ = {"extend_existing": True}
 
     assert "test" in str(app.spec).lower()
+
+
+def test_spec_cache(app, client):
+    resp = client.get("/openapi.json")
+    assert resp.status_code == 200
+    assert app.get_spec_bytes() is app.get_spec_bytes()
+    spec = app._get_spec()
+    assert app._get_spec() is spec
+
+    @app.model
+    class Memo(Model):
+        __table_args__ = {"extend_existing": True}
+
+    # registering a model invalidates the spec
+    assert "Memo" in app._get_spec()["components"]["schemas"]
+    assert "Memo" in client.get("/openapi.json").json["components"]["schemas"]
+
+
+def test_spec_command(app, runner, tmp_path):
+    from djask.cli import spec_command
+
+    output = tmp_path / "openapi.json"
+    result = runner.invoke(spec_command, ["--output", str(output)])
+    assert result.exit_code == 0, result.output
+    assert b'"openapi"' in output.read_bytes()
+
+    # the workers load the written spec instead of generating it
+    output.write_text('{"openapi": "3.0.3", "prebuilt": true}')
+    app.config["DJASK_SPEC_FILE"] = str(output)
+    app._spec_cache.clear()
+    assert app._get_spec()["prebuilt"]
+    assert app.get_spec_bytes() == output.read_bytes()
+
+
+def test_blueprint_model(app):
+    from djask import Blueprint
+
+    bp = Blueprint("shop", __name__)
+
+    @bp.model
+    class Product(Model):
+        __table_args__ = {"extend_existing": True}
+
+    app.register_blueprint(bp)
+    spec = app._get_spec()
+    assert "Product" in spec["components"]["schemas"]
+    assert any(path.startswith("/admin/api/product") for path in spec["paths"])
@@ -4,8 +4,10 @@ from djask import Blueprint
 from djask.admin import Admin
 from djask.auth.models import User
 from djask.db.models import Model
+from djask.db.pagination import approximate_count
 from djask.exceptions import ModelTypeError
 from djask.extensions import db
+from djask.helpers import get_model_form
 
 
 def test_register_invalid_model(admin):
@@ -121,3 +123,116 @@ def test_model_edit(admin, client):
     resp = client.get("/admin/user/10")
     assert resp.status_code == 404
     assert "id 10 not found" in resp.get_data(as_text=True)
+
+
+def test_model_registry(app):
+    bp = Blueprint("registry_bp", __name__)
+
+    @app.model
+    class RegistryModel(Model):
+        __table_args__ = {"extend_existing": True}
+
+    @bp.model
+    class RegistryBpModel(Model):
+        __table_args__ = {"extend_existing": True}
+
+    app.register_blueprint(bp)
+
+    @bp.model
+    class LateBpModel(Model):
+        __table_args__ = {"extend_existing": True}
+
+    assert app.get_model_by_name("registrymodel") is RegistryModel
+    assert app.get_model_by_name("RegistryBpModel") is RegistryBpModel
+    assert app.get_model_by_name("latebpmodel") is LateBpModel
+    assert app.model_registry.get_by_table("registrybpmodel") is RegistryBpModel
+    assert app.model_registry.blueprint_models("registry_bp") == [
+        RegistryBpModel,
+        LateBpModel,
+    ]
+    # lookups must not grow the registry
+    size = len(app.models)
+    for _ in range(3):
+        app.get_model_by_name("registrybpmodel")
+    assert len(app.models) == size
+    assert RegistryBpModel not in app.models
+
+
+def test_model_export(admin, client):
+    resp = client.get("/admin/user")
+    assert "/admin/User/export?format=csv" in resp.get_data(as_text=True)
+    resp = client.get("/admin/user/export?format=csv")
+    assert resp.status_code == 200
+    data = resp.get_data(as_text=True)
+    assert "password_hash" not in data
+    assert "test" in data.splitlines()[1]
+
+
+def test_model_pagination(admin, client):
+    @admin.model
+    class Entry(Model):
+        __table_args__ = {"extend_existing": True}
+
+    db.create_all()
+    db.session.add_all(Entry() for _ in range(20))
+    db.session.commit()
+
+    resp = client.get("/admin/entry")
+    data = resp.get_data(as_text=True)
+    assert "Entry 8\n" in data and "Entry 9\n" not in data
+    assert "20 instances" in data
+    assert "order_by=-id" in data
+    next_url = data.split('href="/admin/Entry?order_by=id&amp;cursor=')[-1]
+    cursor = next_url.split('"')[0]
+    resp = client.get(f"/admin/entry?cursor={cursor}")
+    data = resp.get_data(as_text=True)
+    assert "Entry 9\n" in data and "Entry 8\n" not in data
+
+    resp = client.get("/admin/entry?order_by=-id")
+    data = resp.get_data(as_text=True)
+    assert "Entry 20\n" in data and "Entry 12\n" not in data
+
+    assert client.get("/admin/entry?order_by=created_at").status_code == 400
+    assert client.get("/admin/entry?cursor=bad").status_code == 400
+
+    assert approximate_count(Entry, db.session, 30) == 20
+    assert approximate_count(Entry, db.session, 10) is None
+
+
+def test_model_sort_columns(admin, client):
+    @admin.model
+    class Sample(Model):
+        __table_args__ = {"extend_existing": True}
+        code = db.Column(db.String(32), index=True)
+        notes = db.Column(db.Text)
+
+    db.create_all()
+    db.session.add_all(Sample(code=code) for code in ("b", "a", "c"))
+    db.session.commit()
+
+    data = client.get("/admin/sample").get_data(as_text=True)
+    # the indexed columns are shown and sortable, the others aren't
+    assert "order_by=code" in data and "Code" in data
+    assert "Notes" not in data
+    data = client.get("/admin/sample?order_by=code").get_data(as_text=True)
+    assert "order_by=-code" in data
+    assert data.index("Sample 2\n") < data.index("Sample 1\n")
+
+
+def test_model_form_cache(admin, app):
+    with app.test_request_context():
+        app.preprocess_request()
+        model, form = get_model_form("user")
+        _, form2 = get_model_form("User")
+        assert model is User
+        assert type(form) is type(form2)
+        assert form is not form2
+        assert "password" in form._fields and "password_hash" not in form._fields
+
+        @app.model
+        class FormModel(Model):
+            __table_args__ = {"extend_existing": True}
+
+        # registering a model invalidates the cached forms
+        _, form3 = get_model_form("user")
+        assert type(form3) is not type(form)
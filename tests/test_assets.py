@@ -0,0 +1,59 @@
+import gzip
+
+import brotli
+
+from djask.assets import CACHE_CONTROL
+from djask.assets import load_assets
+
+
+def test_assets(admin, client):
+    resp = client.get("/admin/")
+    html = resp.get_data(as_text=True)
+    assert "bootstrap-icons@" not in html
+    css = client.application.jinja_env.globals["djask_bootstrap_icons"]()
+    assert css.startswith("/djask/assets/css/bootstrap-icons.")
+    assert css in html
+
+    resp = client.get(css, headers={"Accept-Encoding": "gzip, br"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "br"
+    assert resp.headers["Cache-Control"] == CACHE_CONTROL
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    body = brotli.decompress(resp.data).decode()
+    # the font is referenced by its fingerprinted name
+    font = body.split('url("./', 1)[1].split('"', 1)[0]
+    assert font.startswith("fonts/bootstrap-icons.") and "?" not in font
+
+    resp = client.get(css, headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(resp.data).decode() == body
+    resp = client.get(
+        css, headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]}
+    )
+    assert resp.status_code == 304
+
+    resp = client.get(f"/djask/assets/css/{font}", headers={"Accept-Encoding": "br"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "font/woff2"
+    assert "Content-Encoding" not in resp.headers
+
+    assert client.get("/djask/assets/css/style.css").status_code == 404
+
+
+def test_assets_command(app, runner, tmp_path):
+    from djask.cli import assets_command
+
+    result = runner.invoke(assets_command, ["--output", str(tmp_path)])
+    assert result.exit_code == 0
+    assets = load_assets(str(tmp_path))
+    style = assets["css/style.css"]
+    assert (tmp_path / (style.path + ".gz")).exists()
+    assert (tmp_path / (style.path + ".br")).exists()
+    assert set(style.variants) == {"identity", "gzip", "br"}
+
+    app.config["DJASK_ASSETS_DIR"] = str(tmp_path)
+    client = app.test_client()
+    resp = client.get(
+        f"/djask/assets/{style.path}", headers={"Accept-Encoding": "gzip"}
+    )
+    assert gzip.decompress(resp.data) == style.variants["identity"]
@@ -0,0 +1,111 @@
+import pytest
+import sqlalchemy as sa
+
+from djask import Blueprint
+from djask.caching import CacheBackend
+from djask.caching import FileSystemBackend
+from djask.caching import get_view_cache
+from djask.caching import MemoryBackend
+from djask.caching import record_changes
+from djask.caching import SQLiteBackend
+from djask.db import Model
+from djask.exceptions import ModelTypeError
+from djask.extensions import db
+
+
+class Track(Model):
+    title = sa.Column(sa.String(127))
+
+
+@pytest.mark.parametrize("backend", ["memory", "filesystem", "sqlite"])
+def test_view_cache(app, client, tmp_path, backend):
+    app.config["DJASK_CACHE_BACKEND"] = backend
+    if backend != "memory":
+        app.config["DJASK_CACHE_LOCATION"] = str(tmp_path / "cache")
+    db.create_all()
+    calls = []
+
+    @app.get("/tracks")
+    @app.cache(models=[Track], headers=["Accept-Language"])
+    def tracks():
+        calls.append(1)
+        return {"titles": [track.title for track in Track.query.all()]}
+
+    assert client.get("/tracks").json == {"titles": []}
+    assert client.get("/tracks").json == {"titles": []}
+    assert len(calls) == 1
+    client.get("/tracks?page=2")
+    client.get("/tracks", headers={"Accept-Language": "fr"})
+    assert len(calls) == 3
+
+    # committing a change to the model invalidates the responses
+    db.session.add(Track(title="intro"))
+    db.session.commit()
+    assert client.get("/tracks").json == {"titles": ["intro"]}
+    assert len(calls) == 4
+    Track.query.update({"title": "outro"})
+    db.session.commit()
+    assert client.get("/tracks").json == {"titles": ["outro"]}
+
+    # a rolled back change keeps them
+    db.session.add(Track(title="draft"))
+    db.session.flush()
+    db.session.rollback()
+    client.get("/tracks")
+    assert len(calls) == 5
+
+    # so do the bulk inserts once recorded
+    db.session.bulk_insert_mappings(Track, [{"title": "bonus"}])
+    record_changes(db.session, Track)
+    db.session.commit()
+    assert client.get("/tracks").json == {"titles": ["outro", "bonus"]}
+    assert len(calls) == 6
+
+    cache = get_view_cache(app)
+    assert isinstance(
+        cache.backend,
+        {"memory": MemoryBackend, "filesystem": FileSystemBackend}.get(
+            backend, SQLiteBackend
+        ),
+    )
+    cache.backend.clear()
+    client.get("/tracks")
+    assert len(calls) == 7
+
+
+def test_abstract_backend():
+    class Incomplete(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_view_cache_blueprint(app, client):
+    bp = Blueprint("bp", __name__)
+    calls = []
+
+    @bp.route("/hello", methods=["GET", "POST"])
+    @bp.cache(timeout=60)
+    def hello():
+        calls.append(1)
+        return "hello"
+
+    @bp.get("/error")
+    @bp.cache()
+    def error():
+        calls.append(1)
+        return "error", 500
+
+    app.register_blueprint(bp)
+    client.get("/hello")
+    client.get("/hello")
+    client.post("/hello")
+    assert len(calls) == 2
+    client.get("/error")
+    client.get("/error")
+    assert len(calls) == 4
+
+    with pytest.raises(ModelTypeError):
+        bp.cache(models=[object])
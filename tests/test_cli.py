@@ -3,6 +3,9 @@ import pathlib
 import shutil
 
 from djask.admin.cli import create_superuser
+from djask.admin.cli import import_instances
+from djask.admin.cli import purge_tokens
+from djask.auth.models import RefreshToken
 from djask.auth.models import User
 from djask.custom_commands import create_app_command
 from djask.custom_commands import create_bp_command
@@ -16,6 +19,16 @@ def test_create_admin(app, runner):
     assert u.is_admin
 
 
+def test_purge_tokens(app, runner):
+    RefreshToken.issue(1, -60)
+    token = RefreshToken.issue(1, 60)
+    app.db.session.commit()
+    result = runner.invoke(purge_tokens)
+    assert "1 expired refresh tokens deleted." in result.output
+    assert RefreshToken.query.count() == 1
+    assert RefreshToken.rotate(token, 60) is not None
+
+
 def test_create_app(app, runner):
     with runner.isolated_filesystem():
         runner.invoke(create_app_command, ["djaskr"])
@@ -44,3 +57,57 @@ def test_create_blueprint(app, runner):
         shutil.rmtree("djaskr2")
         result = runner.invoke(create_bp_command, ["test"])
         assert isinstance(result.exception, AppDirectoryNotFoundError)
+
+
+def test_import(app, runner):
+    import sqlalchemy as sa
+
+    from djask.db.models import Model
+
+    class Song(Model):
+        __table_args__ = {"extend_existing": True}
+        title = sa.Column(sa.String(64), nullable=False)
+        plays = sa.Column(sa.Integer)
+
+    app.register_model(Song)
+    app.db.create_all()
+
+    lines = [f'{{"name": "song {i}", "plays": {i}}}' for i in range(10)]
+    lines[4] = '{"name": "bad", "plays": "many"}'
+    lines[7] = "not json"
+    ndjson = "\n".join(lines) + "\n"
+    result = runner.invoke(
+        import_instances,
+        ["song", "--map", "name=title", "--batch-size", "3", "--offset", "1"],
+        input=ndjson,
+    )
+    assert result.exit_code == 0, result.output
+    assert "resume with --offset 10" in result.output
+    assert "Record 4 skipped" in result.output
+    assert "Record 7 skipped" in result.output
+    assert Song.query.count() == 7
+    assert Song.query.filter_by(title="song 0").first() is None
+
+    with runner.isolated_filesystem():
+        with open("songs.csv", "w") as f:
+            f.write("title,plays\n")
+            f.writelines(f"csv {i},{i}\n" for i in range(20))
+        result = runner.invoke(
+            import_instances, ["Song", "songs.csv", "--workers", "2"]
+        )
+        assert result.exit_code == 0, result.output
+    assert Song.query.count() == 27
+    assert Song.query.filter_by(title="csv 19").first().plays == 19
+
+    result = runner.invoke(import_instances, ["nope"], input="")
+    assert result.exit_code != 0
+
+    # a batch breaking a constraint is rolled back and can be resumed
+    ndjson = '{"title": "ok", "id": 1000}\n{"title": "dup", "id": 1}\n'
+    result = runner.invoke(
+        import_instances, ["song", "--batch-size", "1"], input=ndjson
+    )
+    assert result.exit_code == 1
+    assert "resume with --offset 1" in result.output
+    assert "The batch at offset 1 was rolled back" in result.output
+    assert Song.query.count() == 28
@@ -0,0 +1,100 @@
+import gzip
+import os
+import zlib
+
+import brotli
+from flask import stream_with_context
+
+from djask.compression import AdaptiveCompress
+from djask.compression import strip_coding
+from djask.extensions import compress
+
+
+def test_levels(app):
+    assert compress.get_level("br", 1000, False) == 5
+    assert compress.get_level("gzip", 1000, False) == 6
+    assert compress.get_level("br", 512 * 1024, False) == 4
+    assert compress.get_level("gzip", 8 * 1024 * 1024, False) == 3
+    assert compress.get_level("br", None, False) == 2
+    assert compress.get_level("gzip", 1000, True) == 1
+    app.config["COMPRESS_BR_LEVEL"] = 3
+    assert compress.get_level("br", 1000, False) == 3
+
+
+def test_compression(app, client):
+    body = {"items": [{"id": i, "name": f"item {i}"} for i in range(500)]}
+
+    @app.get("/large")
+    def large():
+        return body
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/cached")
+    def cached():
+        resp = app.json.response(body)
+        resp.cache_control.public = True
+        resp.cache_control.max_age = 60
+        return resp
+
+    @app.get("/gzipped")
+    def gzipped():
+        return app.response_class(gzip.compress(os.urandom(2000)), mimetype="text/html")
+
+    @app.get("/stream")
+    def stream():
+        def generate():
+            for i in range(100):
+                yield f'{{"id": {i}}}\n'
+
+        return app.response_class(
+            stream_with_context(generate()), mimetype="application/json"
+        )
+
+    stats = AdaptiveCompress.get_stats(app)
+    resp = client.get("/large", headers={"Accept-Encoding": "br"})
+    assert resp.headers["Content-Encoding"] == "br"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert app.json.loads(brotli.decompress(resp.data)) == body
+    assert stats.responses == 1
+    assert stats.bytes_saved > 0 and stats.cpu_time > 0
+    assert stats.as_dict()["bytes_saved_per_cpu_second"] > 0
+
+    resp = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
+    resp = client.get("/gzipped", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
+    assert stats.skipped == 1
+
+    first = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert first.data == second.data
+    assert stats.cache_hits == 1
+
+    resp = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in resp.headers
+    data = zlib.decompress(resp.data, 31).decode()
+    assert data.count("\n") == 100
+
+    # each encoding of a file has its own ETag, and the ranges are left as
+    # they are, as they are offsets into the uncompressed file
+    url = "/djask/static/css/style.css"
+    plain = client.get(url)
+    resp = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.get_etag()[0] == f"{plain.get_etag()[0]}:gzip"
+    assert strip_coding(resp.get_etag()[0]) == plain.get_etag()[0]
+    resp = client.get(url, headers={"Accept-Encoding": "gzip", "Range": "bytes=0-99"})
+    assert resp.status_code == 206
+    assert "Content-Encoding" not in resp.headers
+    assert resp.headers["ETag"] == plain.headers["ETag"]
+    assert resp.data == plain.data[:100]
+    plain.close()
+    resp.close()
+
+    app.config["DJASK_COMPRESS_STREAMS"] = False
+    resp = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
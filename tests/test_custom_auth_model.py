@@ -71,3 +71,37 @@ def test_post(new_client):
     )
     p = Article.query.get(1)
     assert p.author == CustomUser.query.get(1)
+
+
+def test_expand(new_client):
+    headers = admin_headers(new_client)
+    for title in ("abc", "xyz"):
+        new_client.post(
+            "/admin/api/article",
+            json={"title": title, "author_id": 1},
+            headers=headers,
+        )
+
+    resp = new_client.get("/admin/api/article/1?expand=author", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json["author"]["age"] == 15
+    assert "articles" not in resp.json["author"]
+
+    resp = new_client.get("/admin/api/article/1?expand=", headers=headers)
+    assert resp.json["author_id"] == 1
+    assert "author" not in resp.json
+
+    resp = new_client.get("/admin/api/user/1?expand=articles.author", headers=headers)
+    assert [a["title"] for a in resp.json["articles"]] == ["abc", "xyz"]
+    assert resp.json["articles"][0]["author"]["username"] == "test"
+
+    resp = new_client.get("/admin/api/article/1?expand=*", headers=headers)
+    assert resp.json["author"]["username"] == "test"
+
+    resp = new_client.get("/admin/api/article/1?expand=title", headers=headers)
+    assert resp.status_code == 400
+    resp = new_client.get(
+        "/admin/api/article/1?expand=author.articles.author.articles",
+        headers=headers,
+    )
+    assert resp.status_code == 400
@@ -0,0 +1,78 @@
+import sqlalchemy as sa
+
+from djask.db.models import Model
+
+
+class Book(Model):
+    title = sa.Column(sa.String(127))
+    pages = sa.Column(sa.Integer)
+
+
+def test_schema_cache(app):
+    assert Book.to_schema() is Book.to_schema()
+    assert Book.get_schema() is Book.get_schema()
+    assert isinstance(Book.get_schema(), Book.to_schema())
+
+    schema = Book.to_schema()
+
+    class Review(Model):
+        book_id = sa.Column(sa.ForeignKey("book.id"))
+        book = sa.orm.relationship("Book", backref="reviews")
+
+    sa.orm.configure_mappers()
+    # a backref was added to Book, so its schema must be rebuilt
+    assert Book.to_schema() is not schema
+    assert "reviews" in Book.get_schema().fields
+
+
+def test_to_dict(app):
+    class Writer(Model):
+        name = sa.Column(sa.String(127))
+        essays = sa.orm.relationship("Essay", back_populates="writer")
+
+    class Essay(Model):
+        title = sa.Column(sa.String(127))
+        writer_id = sa.Column(sa.ForeignKey("writer.id"))
+        writer = sa.orm.relationship("Writer", back_populates="essays")
+
+    app.db.create_all()
+    writer = Writer(name="abc")
+    app.db.session.add(Essay(title="xyz", writer=writer))
+    app.db.session.commit()
+
+    assert Writer.get_serializer() is Writer.get_serializer()
+    data = writer.to_dict()
+    assert data["name"] == "abc"
+    assert {"id", "created_at", "updated_at"} <= data.keys()
+    assert data["essays"][0]["title"] == "xyz"
+    assert "writer" not in data["essays"][0]
+    assert "essays" not in writer.to_dict(exclude=("essays",))
+    assert writer.to_dict(exclude=["name"]).keys() == data.keys() - {"name"}
+
+
+def test_to_dict_hides_password(admin):
+    from djask.auth.models import User
+
+    data = User.query.first().to_dict()
+    assert data["username"] == "test"
+    assert "password_hash" not in data
+
+
+def test_model_meta(app):
+    class Author(Model):
+        name = sa.Column(sa.String(127), index=True)
+        _secret = sa.Column(sa.String(127))
+
+    class Poem(Model):
+        author_id = sa.Column(sa.ForeignKey("author.id"))
+        author = sa.orm.relationship("Author", backref="poems")
+
+    meta = Author.get_meta()
+    assert Author.get_meta() is meta
+    assert list(meta.columns)[:1] == ["id"]
+    assert meta.pk is Author.__table__.c.id
+    assert meta.indexed == {"id", "name"}
+    assert meta.hidden == {"_secret"}
+    assert meta.types["name"] == "String(length=127)"
+    assert meta.types["poems"] == "Relationship(Poem)"
+    assert "author" in Poem.get_meta().relationships
@@ -25,3 +25,46 @@ def test_user_permissions(app):
 
     with pytest.warns(PermissionExistingWarning):
         u.add_permission(Permission(Post, "read"))
+
+
+def test_permission_set(app):
+    from base64 import b64encode
+
+    u = User(username="test")
+    # the permission of the first model used to be dropped
+    tables = [m.class_.__tablename__ for m in app.db.Model.registry.mappers]
+    assert all(u.has_permission(Permission(t, "read")) for t in tables)
+    assert u.permission_set is u.permission_set
+    u.add_permissions([Permission(Post, "write"), Permission(Post, "delete")])
+    assert u.has_permission(Permission(Post, "write"))
+    assert u.has_permission(Permission("post", "delete"))
+    assert not u.has_permission(Permission(Post, "admin"))
+
+    # permissions stored in the legacy format are still read, and migrated
+    legacy = "".join(
+        b64encode(perm.encode()).decode() + "," for perm in ("post_read", "post_write")
+    )
+    app.db.session.add(u)
+    app.db.session.commit()
+    User.query.filter_by(id=u.id).update({"permissions": legacy})
+    app.db.session.commit()
+    u = User.query.get(u.id)
+    assert u.has_permission(Permission(Post, "write"))
+    assert not u.has_permission(Permission(Post, "delete"))
+    assert User.migrate_permissions(batch_size=1) == 1
+    app.db.session.expire_all()
+    assert User.query.get(u.id).permissions == '["post_read", "post_write"]'
+    assert User.migrate_permissions() == 0
+
+
+def test_permission_index(app):
+    assert Permission(Post, "read") is Permission("post", "read")
+    assert Permission("post", "read") == "post_read"
+
+    class Comment(Model):
+        __table_args__ = {"extend_existing": True}
+
+    # the index is rebuilt for tables mapped since it was built
+    assert Permission("comment", "write") == "comment_write"
+    with pytest.raises(ModelNotFoundError):
+        Permission("non-existing", "write")
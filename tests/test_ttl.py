@@ -0,0 +1,26 @@
+from djask.ttl import TTLCache
+
+
+def test_ttl_cache(monkeypatch):
+    import djask.ttl
+
+    now = [0.0]
+    monkeypatch.setattr(djask.ttl, "monotonic", lambda: now[0])
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    assert cache.get("a") == 1
+    now[0] = 5
+    assert cache.get("b") is None
+    cache.set("c", 3)
+    cache.set("d", 4)
+    # "a" is the least recently used entry
+    assert cache.get("a") is None
+    assert len(cache) == 2
+    cache.discard_if(lambda key, value: value == 3)
+    assert cache.get("c") is None
+    assert cache.pop("d") == 4
+    now[0] = 100
+    cache.set("e", 5)
+    cache.clear()
+    assert cache.get("e", 0) == 0